@@ -0,0 +1,72 @@
+"""Admission control for incoming webhook deliveries."""
+
+import time
+from collections.abc import Hashable
+
+from fastapi import HTTPException, Request
+
+
+async def read_body(request: Request, max_bytes: int) -> bytes:
+    """Read the request body once, rejecting it as soon as it exceeds `max_bytes`.
+
+    Raises:
+        HTTPException: 413 if the body is larger than `max_bytes`
+    """
+    content_length = request.headers.get("Content-Length")
+    if content_length and content_length.isdigit() and int(content_length) > max_bytes:
+        raise HTTPException(status_code=413, detail="Payload too large")
+
+    body = bytearray()
+    async for chunk in request.stream():
+        body.extend(chunk)
+        if len(body) > max_bytes:
+            raise HTTPException(status_code=413, detail="Payload too large")
+    return bytes(body)
+
+
+class AdmissionController:
+    """Dedupes deliveries and reviews within a TTL and bounds the review backlog."""
+
+    def __init__(self, max_backlog: int, dedupe_ttl: float) -> None:
+        self.max_backlog = max_backlog
+        self.dedupe_ttl = dedupe_ttl
+        self.backlog = 0  # admitted reviews waiting for or holding a worker slot
+        self._deliveries: dict[str, float] = {}
+        self._reviews: dict[Hashable, float] = {}
+
+    def _prune(self, seen: dict, now: float) -> None:
+        expired = [key for key, at in seen.items() if now - at > self.dedupe_ttl]
+        for key in expired:
+            del seen[key]
+
+    def seen_delivery(self, delivery_id: str) -> bool:
+        """Return True if this delivery ID was already admitted."""
+        now = time.monotonic()
+        self._prune(self._deliveries, now)
+        return delivery_id in self._deliveries
+
+    def seen_review(self, review_key: Hashable) -> bool:
+        now = time.monotonic()
+        self._prune(self._reviews, now)
+        return review_key in self._reviews
+
+    @property
+    def is_full(self) -> bool:
+        return self.backlog >= self.max_backlog
+
+    def admit(self, review_key: Hashable, delivery_id: str | None = None) -> None:
+        now = time.monotonic()
+        self._reviews[review_key] = now
+        if delivery_id:
+            self._deliveries[delivery_id] = now
+        self.backlog += 1
+
+    def release(
+        self, review_key: Hashable, succeeded: bool, delivery_id: str | None = None
+    ) -> None:
+        self.backlog -= 1
+        if not succeeded:
+            # Let a retry of a failed review through instead of deduping it
+            self._reviews.pop(review_key, None)
+            if delivery_id:
+                self._deliveries.pop(delivery_id, None)
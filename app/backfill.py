@@ -0,0 +1,225 @@
+"""Review already-open pull requests in bulk.
+
+Usage:
+    uv run python -m app.backfill --repo owner/name --org my-org --pr-file prs.txt
+    uv run python -m app.backfill --repo owner/name --dry-run --output-dir results/
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import re
+import statistics
+import time
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Any
+
+from app.config import STATE_DIR
+from app.github_client import GitHubClient
+from app.job import ReviewJob
+from app.reviewer import process_review
+
+
+logger = logging.getLogger(__name__)
+
+PR_URL_RE = re.compile(r"github\.com/([^/\s]+)/([^/\s]+)/pull/(\d+)")
+
+
+def _pr_key(pr: dict[str, Any]) -> str:
+    """Resume key; includes the head SHA so new pushes are reviewed again."""
+    return f"{pr['base']['repo']['full_name']}#{pr['number']}@{pr['head']['sha']}"
+
+
+def _load_done(state_path: Path, dry_run: bool) -> set[str]:
+    """Keys already handled in this mode. A dry run (`reviewed`) does not
+    count as done for a posting run, which would otherwise post nothing."""
+    finished = {"posted", "reviewed"} if dry_run else {"posted"}
+    done: set[str] = set()
+    if not state_path.is_file():
+        return done
+    with open(state_path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if entry.get("status") in finished:
+                done.add(entry["key"])
+    return done
+
+
+def _interleave(pulls: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    """Order PRs round-robin across repos so no repo is served twice in a row
+    while another repo is still waiting."""
+    by_repo: dict[str, list[dict[str, Any]]] = defaultdict(list)
+    for pr in pulls:
+        by_repo[pr["base"]["repo"]["full_name"]].append(pr)
+
+    ordered: list[dict[str, Any]] = []
+    queues = list(by_repo.values())
+    for index in range(max((len(q) for q in queues), default=0)):
+        ordered.extend(q[index] for q in queues if index < len(q))
+    return ordered
+
+
+async def collect_pulls(
+    client: GitHubClient, repos: list[str], orgs: list[str], pr_file: str | None
+) -> list[dict[str, Any]]:
+    pulls: list[dict[str, Any]] = []
+
+    for org in orgs:
+        for repo in await client.list_org_repos(org):
+            repos.append(repo["full_name"])
+
+    for full_name in dict.fromkeys(repos):
+        owner, _, name = full_name.partition("/")
+        found = await client.list_open_pulls(owner, name)
+        logger.info(f"{full_name}: {len(found)} open PRs")
+        pulls.extend(found)
+
+    if pr_file:
+        for line in Path(pr_file).read_text(encoding="utf-8").splitlines():
+            match = PR_URL_RE.search(line)
+            if match:
+                owner, name, number = match.groups()
+                pulls.append(await client.get_pull(owner, name, int(number)))
+
+    unique = {_pr_key(pr): pr for pr in pulls}
+    return list(unique.values())
+
+
+async def run_backfill(
+    pulls: list[dict[str, Any]],
+    github_token: str,
+    parallel: int,
+    per_repo: int,
+    state_path: Path,
+    output_dir: Path | None,
+) -> list[ReviewJob]:
+    """Run `process_review` over `pulls` with a global and per-repo concurrency limit.
+
+    Finished jobs are appended to `state_path` so an interrupted run can be
+    resumed. When `output_dir` is set nothing is posted and each
+    `ReviewResult` is written there as JSON instead.
+    """
+    done = _load_done(state_path, dry_run=output_dir is not None)
+    pending = [pr for pr in _interleave(pulls) if _pr_key(pr) not in done]
+    logger.info(
+        f"Backfill: {len(pending)} PRs to review, {len(pulls) - len(pending)} already done"
+    )
+
+    state_path.parent.mkdir(parents=True, exist_ok=True)
+    if output_dir is not None:
+        output_dir.mkdir(parents=True, exist_ok=True)
+
+    global_slots = asyncio.Semaphore(parallel)
+    repo_slots: dict[str, asyncio.Semaphore] = defaultdict(
+        lambda: asyncio.Semaphore(per_repo)
+    )
+    jobs: list[ReviewJob] = []
+
+    async def review(pr: dict[str, Any]) -> None:
+        key = _pr_key(pr)
+        payload = {
+            "action": "backfill",
+            "repository": pr["base"]["repo"],
+            "pull_request": pr,
+            "sender": pr.get("user", {}),
+        }
+        # Take the repo slot first so a busy repo never holds a global slot while waiting
+        async with repo_slots[pr["base"]["repo"]["full_name"]], global_slots:
+            job = await process_review(payload, github_token, post=output_dir is None)
+
+        if job is None:
+            logger.error(f"Backfill: could not start review of {key}")
+            return
+        jobs.append(job)
+
+        if output_dir is not None and job.result is not None:
+            out_path = output_dir / f"{job.owner}__{job.repo}__{job.pr_number}.json"
+            out_path.write_text(job.result.model_dump_json(indent=2), encoding="utf-8")
+
+        with open(state_path, "a", encoding="utf-8") as f:
+            f.write(
+                json.dumps({"key": key, "status": job.status, "duration": job.duration})
+                + "\n"
+            )
+        logger.info(f"Backfill: {key} {job.status} in {job.duration:.1f}s")
+
+    await asyncio.gather(*(review(pr) for pr in pending))
+    return jobs
+
+
+def print_report(jobs: list[ReviewJob], elapsed: float) -> None:
+    statuses = Counter(job.status for job in jobs)
+    durations = sorted(job.duration for job in jobs if job.duration is not None)
+
+    print(f"\nBackfill finished: {len(jobs)} PRs in {elapsed:.1f}s")
+    print("  " + ", ".join(f"{status}: {count}" for status, count in statuses.items()))
+    if elapsed > 0:
+        print(f"  throughput: {len(jobs) / elapsed * 60:.2f} PRs/min")
+    if durations:
+        p90 = durations[min(len(durations) - 1, int(len(durations) * 0.9))]
+        print(
+            f"  latency: p50={statistics.median(durations):.1f}s "
+            f"p90={p90:.1f}s max={durations[-1]:.1f}s"
+        )
+
+
+async def _main(args: argparse.Namespace) -> None:
+    client = GitHubClient(args.token)
+    try:
+        pulls = await collect_pulls(client, list(args.repo), args.org, args.pr_file)
+    finally:
+        await client.close()
+
+    started = time.monotonic()
+    jobs = await run_backfill(
+        pulls,
+        args.token,
+        args.parallel,
+        args.per_repo,
+        Path(args.state),
+        Path(args.output_dir) if args.dry_run else None,
+    )
+    print_report(jobs, time.monotonic() - started)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Review open pull requests in bulk.")
+    parser.add_argument("--repo", action="append", default=[], help="owner/name")
+    parser.add_argument("--org", action="append", default=[], help="organization")
+    parser.add_argument("--pr-file", help="file with one PR URL per line")
+    parser.add_argument("--token", default=os.getenv("GITHUB_TOKEN", ""))
+    parser.add_argument(
+        "--parallel",
+        type=int,
+        default=3,
+        help="global review limit (the reviewer's own worker slots still apply)",
+    )
+    parser.add_argument("--per-repo", type=int, default=1, help="reviews per repo at once")
+    parser.add_argument(
+        "--state",
+        default=str(STATE_DIR / "backfill.jsonl"),
+        help="resume file; PRs recorded as done here are skipped",
+    )
+    parser.add_argument(
+        "--dry-run", action="store_true", help="write ReviewResult JSON instead of posting"
+    )
+    parser.add_argument("--output-dir", default="backfill-results")
+    args = parser.parse_args()
+
+    if not args.token:
+        parser.error("--token or GITHUB_TOKEN is required")
+    if not (args.repo or args.org or args.pr_file):
+        parser.error("give at least one --repo, --org or --pr-file")
+
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(_main(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,20 @@
 import asyncio
+import json
 import logging
+import os
 import re
+import signal
+import sys
+import tempfile
+import time
 from abc import ABC, abstractmethod
+from pathlib import Path
+
+from pydantic import BaseModel
+
+from app.cli.sandbox import remove_cgroup
+from app.config import ResourcePolicy
+from app.recorder import current_recording
 
 logger = logging.getLogger(__name__)
 
@@ -14,11 +27,50 @@ RATE_LIMIT_PATTERNS = [
 ]
 
 
+SANDBOX_SCRIPT = str(Path(__file__).with_name("sandbox.py"))
+
+
 class CLIError(Exception):
     pass
 
 
+class ResourceUsage(BaseModel):
+    """Resources used by one CLI run, as reported by the sandbox launcher."""
+
+    peak_rss_kb: int
+    cpu_seconds: float
+    cgroup_memory_peak_kb: int | None = None
+    cgroup_cpu_seconds: float | None = None
+    cgroup_error: str | None = None  # why cgroup limits could not be applied
+
+
+def _kill_process_group(proc: asyncio.subprocess.Process) -> None:
+    # The launcher leads its own session, so this also reaches grandchildren
+    try:
+        os.killpg(proc.pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+
+
 class CLIAdapter(ABC):
+    # Adapters that can reuse a pool of long-lived sessions set this to True
+    supports_warm_session = False
+
+    def __init__(
+        self, warm: bool = False, resources: ResourcePolicy | None = None
+    ) -> None:
+        self.resources = resources or ResourcePolicy()
+        self.warm = warm and self.supports_warm_session
+        if self.warm and self.resources.model_dump(exclude_none=True):
+            # Warm sessions are long-lived servers outside the per-run sandbox
+            logger.warning(
+                f"{type(self).__name__}: resource limits set, using cold runs instead of "
+                f"warm sessions so they apply"
+            )
+            self.warm = False
+        self.last_usage: ResourceUsage | None = None
+        self.last_queue_wait = 0.0  # seconds spent waiting for a warm session
+
     @abstractmethod
     async def run_review(self, prompt: str, cwd: str, timeout: int) -> str: ...
 
@@ -28,13 +80,27 @@ class CLIAdapter(ABC):
     async def _execute(
         self, cmd: list[str], cwd: str, timeout: int, stdin: str | None = None
     ) -> str:
+        started = time.monotonic()
+        fd, report_path = tempfile.mkstemp(prefix="cli-usage-", suffix=".json")
+        os.close(fd)
+        launcher = [
+            sys.executable,
+            SANDBOX_SCRIPT,
+            "--report",
+            report_path,
+            "--policy",
+            self.resources.model_dump_json(exclude_none=True),
+            "--",
+        ]
         try:
             proc = await asyncio.create_subprocess_exec(
+                *launcher,
                 *cmd,
                 stdin=asyncio.subprocess.PIPE if stdin else None,
                 stdout=asyncio.subprocess.PIPE,
                 stderr=asyncio.subprocess.PIPE,
                 cwd=cwd,
+                start_new_session=True,
             )
 
             try:
@@ -44,10 +110,35 @@ class CLIAdapter(ABC):
                 )
             except asyncio.TimeoutError:
                 logger.error(f"CLI timeout after {timeout}s: {cmd[0]}")
-                proc.kill()
+                _kill_process_group(proc)
                 await proc.wait()
+                # The launcher was killed before it could clean up its cgroup
+                group = self._read_cgroup(report_path)
+                if group is not None:
+                    await asyncio.to_thread(remove_cgroup, group)
                 raise
 
+            self.last_usage = self._read_usage(report_path)
+            if self.last_usage is not None and self.last_usage.cgroup_error:
+                logger.warning(
+                    f"cgroup limits not applied to '{cmd[0]}': {self.last_usage.cgroup_error}"
+                )
+            if self.last_usage is not None:
+                logger.info(
+                    f"CLI '{cmd[0]}' peak RSS {self.last_usage.peak_rss_kb // 1024} MB, "
+                    f"CPU {self.last_usage.cpu_seconds:.1f}s"
+                )
+
+            recording = current_recording.get()
+            if recording is not None:
+                recording.add_process(
+                    cmd[0],
+                    stdout.decode(errors="replace"),
+                    stderr.decode(errors="replace"),
+                    proc.returncode,
+                    time.monotonic() - started,
+                )
+
             output = stdout.decode() + stderr.decode()
 
             if proc.returncode != 0:
@@ -55,10 +146,7 @@ class CLIAdapter(ABC):
                     f"CLI '{cmd[0]}' exited with code {proc.returncode}: {output[:200]}"
                 )
 
-            for pattern in RATE_LIMIT_PATTERNS:
-                if pattern.search(output):
-                    raise CLIError(f"CLI '{cmd[0]}' hit rate limit: {output[:200]}")
-
+            self._check_rate_limit(cmd[0], output)
             return output
 
         except (CLIError, asyncio.TimeoutError):
@@ -66,10 +154,40 @@ class CLIAdapter(ABC):
         except Exception as e:
             logger.error(f"CLI execution error: {cmd[0]}, {e}")
             raise
+        finally:
+            Path(report_path).unlink(missing_ok=True)
+
+    @staticmethod
+    def _check_rate_limit(name: str, output: str) -> None:
+        for pattern in RATE_LIMIT_PATTERNS:
+            if pattern.search(output):
+                raise CLIError(f"CLI '{name}' hit rate limit: {output[:200]}")
+
+    @staticmethod
+    def _read_cgroup(report_path: str) -> Path | None:
+        try:
+            group = json.loads(Path(report_path).read_text()).get("cgroup")
+        except (OSError, ValueError):
+            return None
+        return Path(group) if group else None
+
+    @staticmethod
+    def _read_usage(report_path: str) -> ResourceUsage | None:
+        try:
+            return ResourceUsage.model_validate(json.loads(Path(report_path).read_text()))
+        except (OSError, ValueError):
+            return None
+
 
+def get_adapter(
+    cli_name: str, warm: bool = False, resources: ResourcePolicy | None = None
+) -> CLIAdapter:
+    """Factory function to get CLI adapter by name.
 
-def get_adapter(cli_name: str) -> CLIAdapter:
-    """Factory function to get CLI adapter by name"""
+    With `warm=True`, adapters that support it reuse pooled long-lived
+    sessions instead of spawning a fresh CLI process per review.
+    `resources` limits the CLI's subprocess tree.
+    """
     from app.cli.claude import ClaudeAdapter
     from app.cli.codex import CodexAdapter
     from app.cli.gemini import GeminiAdapter
@@ -87,4 +205,4 @@ def get_adapter(cli_name: str) -> CLIAdapter:
     if cli_name not in adapters:
         raise ValueError(f"Unknown CLI: {cli_name}")
 
-    return adapters[cli_name]()
+    return adapters[cli_name](warm=warm, resources=resources)
@@ -1,8 +1,108 @@
+import asyncio
 import json
-from app.cli.base import CLIAdapter
+import logging
+import socket
+
+import httpx
+
+from app.cli.base import CLIAdapter, CLIError
+from app.cli.session import WarmSession, get_session_pool
+
+logger = logging.getLogger(__name__)
+
+SERVER_START_TIMEOUT = 30  # seconds
+
+
+def _free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class OpenCodeServerSession(WarmSession):
+    """`opencode serve` process; each review runs in its own server session
+    scoped to the job's directory via the `directory` query parameter."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.port = _free_port()
+        self.proc: asyncio.subprocess.Process | None = None
+        self.client = httpx.AsyncClient(base_url=f"http://127.0.0.1:{self.port}")
+
+    async def start(self) -> None:
+        self.proc = await asyncio.create_subprocess_exec(
+            "opencode",
+            "serve",
+            "--hostname",
+            "127.0.0.1",
+            "--port",
+            str(self.port),
+            stdout=asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.DEVNULL,
+        )
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + SERVER_START_TIMEOUT
+        while loop.time() < deadline:
+            if await self.is_healthy():
+                return
+            if self.proc.returncode is not None:
+                break
+            await asyncio.sleep(0.2)
+
+        await self.close()
+        raise CLIError(f"opencode serve did not become ready on port {self.port}")
+
+    async def is_healthy(self) -> bool:
+        if self.proc is None or self.proc.returncode is not None:
+            return False
+        try:
+            response = await self.client.get("/config", timeout=5.0)
+        except httpx.HTTPError:
+            return False
+        return response.status_code == 200
+
+    async def review(self, prompt: str, cwd: str, timeout: int) -> str:
+        params = {"directory": cwd}
+        response = await self.client.post("/session", params=params, json={})
+        response.raise_for_status()
+        session_id = response.json()["id"]
+
+        try:
+            response = await asyncio.wait_for(
+                self.client.post(
+                    f"/session/{session_id}/message",
+                    params=params,
+                    json={"parts": [{"type": "text", "text": prompt}]},
+                    timeout=None,
+                ),
+                timeout=timeout,
+            )
+            response.raise_for_status()
+        except asyncio.TimeoutError:
+            logger.error(f"CLI timeout after {timeout}s: opencode session {session_id}")
+            raise
+        finally:
+            try:
+                await self.client.delete(f"/session/{session_id}", params=params)
+            except httpx.HTTPError:
+                pass
+
+        parts = response.json().get("parts", [])
+        return "".join(
+            part.get("text", "") for part in parts if part.get("type") == "text"
+        )
+
+    async def close(self) -> None:
+        await self.client.aclose()
+        if self.proc is not None and self.proc.returncode is None:
+            self.proc.kill()
+            await self.proc.wait()
 
 
 class OpenCodeAdapter(CLIAdapter):
+    supports_warm_session = True
+
     def build_command(self, prompt: str, cwd: str) -> list[str]:
         return [
             "opencode",
@@ -13,6 +113,25 @@ class OpenCodeAdapter(CLIAdapter):
         ]
 
     async def run_review(self, prompt: str, cwd: str, timeout: int) -> str:
+        if self.warm:
+            pool = get_session_pool("opencode", OpenCodeServerSession)
+            checked_out = False
+            try:
+                async with pool.session(wait_timeout=timeout) as session:
+                    checked_out = True
+                    self.last_queue_wait = session.queue_wait
+                    output = await session.review(prompt, cwd, timeout)
+            except asyncio.TimeoutError:
+                if checked_out:
+                    raise
+                # No warm session freed up in time: run a cold CLI instead
+                logger.warning(f"No warm opencode session after {timeout}s, spawning one")
+                self.last_queue_wait = float(timeout)
+            else:
+                # Checked after returning the session: a rate limit is not its fault
+                self._check_rate_limit("opencode", output)
+                return output
+
         cmd = self.build_command(prompt, cwd)
         raw_output = await self._execute(cmd, cwd, timeout)
 
@@ -0,0 +1,64 @@
+import asyncio
+from contextvars import ContextVar
+
+from app.cli.base import CLIAdapter, CLIError
+from app.recorder import AdapterRun, Recording, prompt_hash
+
+
+class Replayer:
+    """Serves recorded adapter runs back in place of real CLIs."""
+
+    def __init__(self, recording: Recording, scale: float = 1.0) -> None:
+        self.scale = scale
+        self.context_pack = recording.prompts.get("context", "")
+        self._pending = list(recording.adapter_runs)
+
+    def take(self, cli: str, prompt: str) -> AdapterRun | None:
+        """Pop the recorded run for this CLI and prompt, or the next run of
+        the CLI if the prompt changed (e.g. when benchmarking prompt edits)."""
+        wanted = prompt_hash(prompt)
+        candidates = [run for run in self._pending if run.cli == cli]
+        run = next((r for r in candidates if r.prompt_hash == wanted), None)
+        if run is None and candidates:
+            run = candidates[0]
+        if run is not None:
+            self._pending.remove(run)
+        return run
+
+    def adapter(self, cli_name: str) -> "ReplayAdapter":
+        return ReplayAdapter(self, cli_name)
+
+
+class ReplayAdapter(CLIAdapter):
+    def __init__(self, replayer: Replayer, cli_name: str) -> None:
+        super().__init__()
+        self.replayer = replayer
+        self.cli_name = cli_name
+
+    def build_command(self, prompt: str, cwd: str) -> list[str]:
+        return [self.cli_name]
+
+    async def run_review(self, prompt: str, cwd: str, timeout: int) -> str:
+        run = self.replayer.take(self.cli_name, prompt)
+        if run is None:
+            raise CLIError(f"No recorded run for CLI '{self.cli_name}'")
+
+        # Replay the recorded outcome under the recorded limit; the current
+        # `timeout` comes from replay's own history and only applies to
+        # recordings that predate `AdapterRun.timeout`
+        delay = run.duration * self.replayer.scale
+        limit = run.timeout * self.replayer.scale if run.timeout is not None else timeout
+        if delay > limit:
+            await asyncio.sleep(limit)
+            raise asyncio.TimeoutError()
+        await asyncio.sleep(delay)
+
+        if run.timed_out:
+            raise asyncio.TimeoutError()
+        if run.error is not None:
+            raise CLIError(run.error)
+        return run.output or ""
+
+
+# Set by app.replay while a recording is being replayed
+current_replay: ContextVar[Replayer | None] = ContextVar("current_replay", default=None)
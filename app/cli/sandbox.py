@@ -0,0 +1,187 @@
+"""Launcher that runs one CLI command under a resource policy.
+
+Run as a script (stdlib only, since it starts in the job's clone directory):
+
+    python sandbox.py --report REPORT.json --policy '{"max_processes": 64}' -- cmd args...
+
+The command runs in a forked child that joins a fresh cgroup v2 group (when
+`cpu_weight` or `memory_max_mb` is set and cgroups are writable), applies
+rlimits, then execs. The launcher waits with wait4 and writes the child's
+peak RSS and CPU time to the report file, then exits with the child's status.
+
+Review groups are created next to the service's own processes in its
+delegated cgroup (systemd `Delegate=yes`). cgroup v2 only allows enabling
+controllers for children of a group without processes of its own, so on
+first use the service's processes are moved into a `server` leaf group.
+The group path is written to the report before the command starts, so the
+caller can kill and remove the group if it has to kill the launcher.
+"""
+
+import argparse
+import errno
+import json
+import os
+import resource
+import sys
+import time
+from pathlib import Path
+
+CGROUP_ROOT = Path("/sys/fs/cgroup")
+SERVER_LEAF = "server"  # leaf group holding the service's own processes
+
+
+def _own_cgroup() -> Path | None:
+    try:
+        for line in Path("/proc/self/cgroup").read_text().splitlines():
+            if line.startswith("0::"):
+                return CGROUP_ROOT / line[3:].lstrip("/")
+    except OSError:
+        pass
+    return None
+
+
+def _move_processes_to_leaf(parent: Path) -> None:
+    leaf = parent / SERVER_LEAF
+    leaf.mkdir(exist_ok=True)
+    for pid in (parent / "cgroup.procs").read_text().split():
+        try:
+            (leaf / "cgroup.procs").write_text(pid)
+        except OSError:
+            pass  # exited in the meantime
+
+
+def _enable_controllers(parent: Path, controllers: set[str]) -> None:
+    enabled = set((parent / "cgroup.subtree_control").read_text().split())
+    missing = controllers - enabled
+    if not missing:
+        return
+    available = set((parent / "cgroup.controllers").read_text().split())
+    if missing - available:
+        raise OSError(
+            f"controllers {', '.join(sorted(missing - available))} not delegated to {parent}"
+        )
+    request = " ".join(f"+{name}" for name in sorted(missing))
+    try:
+        (parent / "cgroup.subtree_control").write_text(request)
+    except OSError as exc:
+        if exc.errno != errno.EBUSY:
+            raise
+        # The group still has processes of its own ("no internal processes" rule)
+        _move_processes_to_leaf(parent)
+        (parent / "cgroup.subtree_control").write_text(request)
+
+
+def _create_cgroup(policy: dict, report: dict) -> Path | None:
+    controllers = set()
+    if policy.get("cpu_weight"):
+        controllers.add("cpu")
+    if policy.get("memory_max_mb"):
+        controllers.add("memory")
+    if not controllers:
+        return None
+    parent = _own_cgroup()
+    if parent is not None and parent.name == SERVER_LEAF:
+        parent = parent.parent
+    if parent is None or not (parent / "cgroup.subtree_control").exists():
+        report["cgroup_error"] = "cgroup v2 not available"
+        return None
+
+    group = parent / f"review-{os.getpid()}"
+    try:
+        _enable_controllers(parent, controllers)
+        group.mkdir()
+        if policy.get("cpu_weight"):
+            (group / "cpu.weight").write_text(str(policy["cpu_weight"]))
+        if policy.get("memory_max_mb"):
+            (group / "memory.max").write_text(str(policy["memory_max_mb"] * 1024 * 1024))
+    except OSError as exc:
+        report["cgroup_error"] = str(exc)
+        remove_cgroup(group)
+        return None
+    return group
+
+
+def remove_cgroup(group: Path) -> None:
+    """Kill anything still running in `group` and remove it."""
+    try:
+        (group / "cgroup.kill").write_text("1")
+    except OSError:
+        pass  # already gone, or a kernel without cgroup.kill
+    for _ in range(50):
+        try:
+            group.rmdir()
+            return
+        except FileNotFoundError:
+            return
+        except OSError:
+            time.sleep(0.02)  # killed processes take a moment to leave
+
+
+def _cgroup_stats(group: Path) -> dict:
+    stats: dict = {}
+    try:
+        stats["cgroup_memory_peak_kb"] = int((group / "memory.peak").read_text()) // 1024
+    except (OSError, ValueError):
+        pass
+    try:
+        for line in (group / "cpu.stat").read_text().splitlines():
+            key, _, value = line.partition(" ")
+            if key == "usage_usec":
+                stats["cgroup_cpu_seconds"] = int(value) / 1_000_000
+    except (OSError, ValueError):
+        pass
+    return stats
+
+
+def _apply_rlimits(policy: dict) -> None:
+    limits = {
+        "max_memory_mb": (resource.RLIMIT_AS, lambda v: v * 1024 * 1024),
+        "max_cpu_seconds": (resource.RLIMIT_CPU, lambda v: v),
+        "max_processes": (resource.RLIMIT_NPROC, lambda v: v),
+    }
+    for key, (limit, convert) in limits.items():
+        if policy.get(key):
+            value = convert(policy[key])
+            resource.setrlimit(limit, (value, value))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--report", required=True)
+    parser.add_argument("--policy", default="{}")
+    parser.add_argument("command", nargs=argparse.REMAINDER)
+    args = parser.parse_args()
+
+    command = args.command[1:] if args.command[:1] == ["--"] else args.command
+    policy = json.loads(args.policy)
+    report: dict = {}
+    group = _create_cgroup(policy, report)
+    if group is not None:
+        Path(args.report).write_text(json.dumps({"cgroup": str(group)}))
+
+    pid = os.fork()
+    if pid == 0:
+        try:
+            if group is not None:
+                (group / "cgroup.procs").write_text("0")
+            _apply_rlimits(policy)
+            os.execvp(command[0], command)
+        except OSError as exc:
+            print(f"sandbox: cannot start {command[0]}: {exc}", file=sys.stderr)
+        os._exit(127)
+
+    _, status, usage = os.wait4(pid, 0)
+
+    report["peak_rss_kb"] = usage.ru_maxrss
+    report["cpu_seconds"] = usage.ru_utime + usage.ru_stime
+    if group is not None:
+        report.update(_cgroup_stats(group))
+        remove_cgroup(group)
+    Path(args.report).write_text(json.dumps(report))
+
+    code = os.waitstatus_to_exitcode(status)
+    sys.exit(code if code >= 0 else 128 - code)  # killed by signal N -> 128 + N
+
+
+if __name__ == "__main__":
+    main()
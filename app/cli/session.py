@@ -0,0 +1,122 @@
+"""Pools of warm, long-lived CLI sessions reused across reviews."""
+
+import asyncio
+import logging
+import os
+import time
+from abc import ABC, abstractmethod
+from collections.abc import Callable
+from contextlib import asynccontextmanager
+
+logger = logging.getLogger(__name__)
+
+
+class WarmSession(ABC):
+    """A long-lived CLI process that can run several reviews one after another.
+
+    Each review must be isolated to the `cwd` it is given; sessions that
+    cannot switch working directory per request should not implement this.
+    """
+
+    def __init__(self) -> None:
+        self.reviews = 0
+        self.queue_wait = 0.0  # seconds the current checkout waited for a pool slot
+
+    @abstractmethod
+    async def start(self) -> None: ...
+
+    @abstractmethod
+    async def is_healthy(self) -> bool: ...
+
+    @abstractmethod
+    async def review(self, prompt: str, cwd: str, timeout: int) -> str: ...
+
+    @abstractmethod
+    async def close(self) -> None: ...
+
+
+class SessionPool:
+    """Hands out idle sessions, replacing ones that are unhealthy or worn out."""
+
+    def __init__(
+        self,
+        name: str,
+        factory: Callable[[], WarmSession],
+        size: int,
+        max_reviews: int,
+    ) -> None:
+        self.name = name
+        self.factory = factory
+        self.max_reviews = max_reviews
+        self._idle: list[WarmSession] = []
+        self._slots = asyncio.Semaphore(size)
+
+    async def _discard(self, session: WarmSession) -> None:
+        try:
+            await session.close()
+        except Exception as exc:
+            logger.warning(f"Failed to close {self.name} session: {exc}")
+
+    async def _checkout(self) -> WarmSession:
+        while self._idle:
+            session = self._idle.pop()
+            if await session.is_healthy():
+                return session
+            logger.warning(f"Discarding unhealthy {self.name} session")
+            await self._discard(session)
+
+        session = self.factory()
+        await session.start()
+        logger.info(f"Started warm {self.name} session")
+        return session
+
+    @asynccontextmanager
+    async def session(self, wait_timeout: float | None = None):
+        """Check out a session, waiting at most `wait_timeout` seconds for a
+        free slot (raises asyncio.TimeoutError). The wait is stored on the
+        session as `queue_wait` so callers can exclude it from run time."""
+        started = time.monotonic()
+        await asyncio.wait_for(self._slots.acquire(), wait_timeout)
+        waited = time.monotonic() - started
+        try:
+            session = await self._checkout()
+            session.queue_wait = waited
+            reusable = False
+            try:
+                yield session
+                reusable = True
+            finally:
+                session.reviews += 1
+                if reusable and session.reviews < self.max_reviews:
+                    self._idle.append(session)
+                else:
+                    if reusable:
+                        logger.info(
+                            f"Recycling {self.name} session after {session.reviews} reviews"
+                        )
+                    await self._discard(session)
+        finally:
+            self._slots.release()
+
+    async def close(self) -> None:
+        while self._idle:
+            await self._discard(self._idle.pop())
+
+
+_pools: dict[str, SessionPool] = {}
+
+
+def get_session_pool(name: str, factory: Callable[[], WarmSession]) -> SessionPool:
+    if name not in _pools:
+        _pools[name] = SessionPool(
+            name,
+            factory,
+            size=int(os.getenv("WARM_POOL_SIZE", "2")),
+            max_reviews=int(os.getenv("WARM_SESSION_MAX_REVIEWS", "20")),
+        )
+    return _pools[name]
+
+
+async def close_session_pools() -> None:
+    for pool in _pools.values():
+        await pool.close()
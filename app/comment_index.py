@@ -0,0 +1,117 @@
+"""Match new review comments against the bot's comments already on a PR."""
+
+import hashlib
+from dataclasses import dataclass, field
+from typing import Any
+
+from app.diff import new_side_lines
+from app.similarity import fingerprint, text_similarity
+
+SIMILARITY_THRESHOLD = 0.6  # minimum text similarity to treat two comments as one finding
+
+
+def anchor_hash(text: str) -> str:
+    """Hash of the commented line, ignoring indentation and trailing whitespace."""
+    return hashlib.sha256(text.strip().encode("utf-8")).hexdigest()[:16]
+
+
+def _hunk_anchor(diff_hunk: str) -> str | None:
+    # GitHub's diff_hunk for a comment ends with the line it is attached to
+    lines = diff_hunk.splitlines()
+    if not lines or lines[-1].startswith("@@"):
+        return None
+    return anchor_hash(lines[-1][1:])
+
+
+@dataclass
+class ExistingComment:
+    id: int
+    path: str
+    line: int | None  # None once the code it was attached to changed
+    body: str
+    anchor: str | None
+    fingerprint: str
+
+    @property
+    def outdated(self) -> bool:
+        return self.line is None
+
+
+@dataclass
+class CommentPlan:
+    new: list[dict[str, Any]] = field(default_factory=list)
+    updates: list[tuple[ExistingComment, str]] = field(default_factory=list)
+    unchanged: list[ExistingComment] = field(default_factory=list)
+    outdated: list[ExistingComment] = field(default_factory=list)
+
+
+class CommentIndex:
+    """Index of the bot's top-level review comments on one PR, keyed on
+    path, line-anchored content hash and normalized body fingerprint."""
+
+    def __init__(self, comments: list[dict[str, Any]], bot_login: str) -> None:
+        self.comments: list[ExistingComment] = []
+        for comment in comments:
+            if (comment.get("user") or {}).get("login") != bot_login:
+                continue
+            if comment.get("in_reply_to_id"):
+                continue
+            self.comments.append(
+                ExistingComment(
+                    id=comment["id"],
+                    path=comment["path"],
+                    line=comment.get("line"),
+                    body=comment["body"],
+                    anchor=_hunk_anchor(comment.get("diff_hunk") or ""),
+                    fingerprint=fingerprint(comment["body"]),
+                )
+            )
+
+        self._by_anchor: dict[tuple[str, str], list[ExistingComment]] = {}
+        self._by_line: dict[tuple[str, int], list[ExistingComment]] = {}
+        for existing in self.comments:
+            if existing.outdated:
+                continue
+            if existing.anchor is not None:
+                self._by_anchor.setdefault((existing.path, existing.anchor), []).append(existing)
+            self._by_line.setdefault((existing.path, existing.line), []).append(existing)
+
+    def _candidates(self, path: str, line: int, anchor: str | None) -> list[ExistingComment]:
+        if anchor is not None and (path, anchor) in self._by_anchor:
+            return self._by_anchor[(path, anchor)]
+        return self._by_line.get((path, line), [])
+
+    def plan(self, comments: list[dict[str, Any]], diff: str) -> CommentPlan:
+        """Split new comments into ones to post, existing comments to update
+        in place and ones already posted; outdated comments are returned
+        so their threads can be resolved."""
+        lines = new_side_lines(diff)
+        plan = CommentPlan(outdated=[c for c in self.comments if c.outdated])
+        claimed: set[int] = set()
+
+        for comment in comments:
+            text = lines.get(comment["path"], {}).get(comment["line"])
+            anchor = anchor_hash(text) if text is not None else None
+            body_fingerprint = fingerprint(comment["body"])
+
+            match, exact = None, False
+            for existing in self._candidates(comment["path"], comment["line"], anchor):
+                if existing.id in claimed:
+                    continue
+                if existing.fingerprint == body_fingerprint:
+                    match, exact = existing, True
+                    break
+                similarity = text_similarity(existing.body, comment["body"])
+                if match is None and similarity >= SIMILARITY_THRESHOLD:
+                    match = existing
+
+            if match is None:
+                plan.new.append(comment)
+                continue
+            claimed.add(match.id)
+            if exact:
+                plan.unchanged.append(match)
+            else:
+                plan.updates.append((match, comment["body"]))
+
+        return plan
@@ -1,7 +1,21 @@
+import os
 import yaml
 from pathlib import Path
 from pydantic import BaseModel, Field
 
+# Directory for runtime state (run history, caches) that survives restarts
+STATE_DIR = Path(os.getenv("STATE_DIR", ".state"))
+
+
+class ResourcePolicy(BaseModel):
+    """Resource limits for one CLI's subprocess tree. Unset fields are not limited."""
+
+    max_memory_mb: int | None = None  # RLIMIT_AS per process; Node CLIs reserve a lot of address space
+    max_cpu_seconds: int | None = None  # RLIMIT_CPU per process
+    max_processes: int | None = None  # RLIMIT_NPROC, counted per user, not per run
+    cpu_weight: int | None = None  # cgroup v2 cpu.weight (1-10000, default 100)
+    memory_max_mb: int | None = None  # cgroup v2 memory.max for the whole run
+
 
 class RepoConfig(BaseModel):
     """Per-repository configuration for code review settings."""
@@ -12,9 +26,33 @@ class RepoConfig(BaseModel):
     )
     review_mode: str = "single"  # "single" = fallback chain, "multi" = all CLIs in parallel + synthesis
     synthesizer_cli: str = "claude"  # CLI used to synthesize multiple reviews into one
+    synthesis: str = "local"  # "local" = merge without LLM, "llm" = always synthesizer_cli, "auto" = LLM only on conflicts
     language: str = "en"
-    timeout: int = 600  # seconds
+    timeout: int = 600  # seconds, used until enough run history exists
+    adaptive_timeout: bool = True  # derive per-CLI timeouts from run history
+    timeout_min: int = 120  # seconds, floor for adaptive timeouts
+    timeout_max: int = 900  # seconds, ceiling for adaptive timeouts
+    timeout_percentile: float = 95.0  # percentile of similar past runs
+    timeout_safety_factor: float = 1.5  # multiplier applied to the percentile
     max_budget_usd: float = 1.0  # Claude only
+    context_pack: bool = True  # add precomputed symbol/reference context to the prompt
+    context_max_chars: int = 12000
+    dedupe_comments: bool = True  # skip findings already posted, resolve outdated threads
+    record_traffic: bool = False  # save payload, diff, prompts and CLI output for replay
+    warm_sessions: bool = False  # reuse pooled long-lived CLI sessions where supported (opencode)
+    resources: dict[str, ResourcePolicy] = Field(default_factory=dict)  # per CLI name
+    routing: bool = True  # reorder/trim CLIs based on PR size and adapter health
+    small_pr_max_lines: int = 40  # PRs at or below this get one fast reviewer
+    small_pr_max_files: int = 3
+    large_pr_min_lines: int = 1000  # PRs at or above this are scheduled as large jobs
+    large_pr_min_files: int = 50
+    queue_weight: float = 1.0  # share of review capacity relative to other repos
+    routing_window: int = 3600  # seconds of run history used for adapter health
+    min_success_rate: float = 0.5  # CLIs below this are demoted or dropped
+    cli_cost_usd: dict[str, float] = Field(default_factory=dict)  # estimated cost per review
+    cost_weight: float = 60.0  # seconds of latency one USD is worth when ranking CLIs
+    cli_languages: dict[str, list[str]] = Field(default_factory=dict)  # CLI -> preferred extensions
+    medium_pr_reviewers: int = 2  # multi-mode reviewers for PRs that are neither small nor large
 
 
 class AppConfig(BaseModel):
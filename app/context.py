@@ -0,0 +1,414 @@
+"""Precomputed code context for reviewers.
+
+Builds an index of definitions and identifiers in a cloned repo, cached per
+repo and commit, and renders a size-bounded "context pack" describing the
+symbols a diff touches: where they are defined, where they are referenced,
+and the definitions the changed code relies on. Reviewers get this in the
+prompt instead of spending their time budget grepping the clone.
+"""
+
+import ast
+import gzip
+import logging
+import os
+import re
+import subprocess
+from pathlib import Path
+
+from pydantic import BaseModel, Field
+
+from app.config import STATE_DIR
+from app.diff import new_side_lines
+
+
+logger = logging.getLogger(__name__)
+
+CONTEXT_DIR = STATE_DIR / "context"
+MAX_FILE_BYTES = 512 * 1024
+MAX_INDEXED_FILES = 20000
+MAX_CACHED_COMMITS = 5  # per repo
+MAX_REFERENCES = 5  # per changed symbol
+MAX_SYMBOLS = 25
+MAX_DEFINITIONS_PER_NAME = 3
+MAX_LINES_PER_NAME = 200  # indexed occurrences of one identifier per file
+INDEX_VERSION = 2  # bump when the cached index format changes
+
+# Identifier tokens outside strings and comments, for non-Python sources
+STRING_RE = re.compile(r'"(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\'|`(?:\\.|[^`\\])*`')
+TOKEN_RE = re.compile(r"(\.|->|::)?\s*([A-Za-z_$][\w$]{2,})")
+BLOCK_COMMENT_RE = re.compile(r"/\*.*?\*/")
+HASH_COMMENT_EXTENSIONS = {".py", ".rb", ".php"}
+
+# ctags-style definition patterns for non-Python sources
+DEFINITION_PATTERNS = [
+    (re.compile(r"^\s*(?:export\s+)?(?:default\s+)?(?:abstract\s+)?class\s+([A-Za-z_$][\w$]*)"), "class"),
+    (re.compile(r"^\s*(?:export\s+)?(?:default\s+)?(?:async\s+)?function\s*\*?\s*([A-Za-z_$][\w$]*)"), "function"),
+    (re.compile(r"^\s*(?:export\s+)?(?:const|let|var)\s+([A-Za-z_$][\w$]*)\s*=\s*(?:async\s+)?(?:function|\([^)]*\)\s*=>|[A-Za-z_$][\w$]*\s*=>)"), "function"),
+    (re.compile(r"^\s*(?:export\s+)?(?:interface|type|enum)\s+([A-Za-z_$][\w$]*)"), "type"),
+    (re.compile(r"^func\s+(?:\([^)]*\)\s*)?([A-Za-z_]\w*)"), "function"),
+    (re.compile(r"^type\s+([A-Za-z_]\w*)\s+(?:struct|interface)"), "type"),
+    (re.compile(r"^\s*(?:pub(?:\([^)]*\))?\s+)?(?:async\s+)?fn\s+([A-Za-z_]\w*)"), "function"),
+    (re.compile(r"^\s*(?:pub(?:\([^)]*\))?\s+)?(?:struct|enum|trait)\s+([A-Za-z_]\w*)"), "type"),
+    (re.compile(r"^\s*(?:(?:public|private|protected|internal|static|final|abstract|open|data|sealed)\s+)*(?:class|interface|object|record)\s+([A-Za-z_]\w*)"), "class"),
+    (re.compile(r"^\s*(?:(?:public|private|protected|internal|static|final|abstract|override|suspend|synchronized)\s+)+[\w<>\[\],\s]*?\s([A-Za-z_]\w*)\s*\([^;]*$"), "method"),
+    (re.compile(r"^\s*fun\s+(?:<[^>]*>\s*)?(?:[\w.]+\.)?([A-Za-z_]\w*)"), "function"),
+    (re.compile(r"^\s*def\s+(?:self\.)?([A-Za-z_]\w*[?!]?)"), "function"),
+]
+
+SOURCE_EXTENSIONS = {
+    ".py", ".js", ".jsx", ".mjs", ".cjs", ".ts", ".tsx", ".go", ".rs", ".java",
+    ".kt", ".kts", ".scala", ".rb", ".php", ".cs", ".swift", ".c", ".h", ".cc",
+    ".cpp", ".hpp", ".m", ".dart", ".vue", ".svelte",
+}
+
+
+class Symbol(BaseModel):
+    name: str
+    kind: str  # "function", "class", "method", "type"
+    line: int
+    end_line: int
+    parent: str | None = None  # enclosing class of a Python method
+
+
+class FileIndex(BaseModel):
+    definitions: list[Symbol] = Field(default_factory=list)
+    # Lines where an identifier is used in code: bare (and, for Python,
+    # `module.name`) in `names`, after `.`/`->`/`::` in `attributes`
+    names: dict[str, list[int]] = Field(default_factory=dict)
+    attributes: dict[str, list[int]] = Field(default_factory=dict)
+
+
+class RepoIndex(BaseModel):
+    version: int = INDEX_VERSION
+    commit: str
+    files: dict[str, FileIndex] = Field(default_factory=dict)
+
+
+def _add_occurrence(table: dict[str, list[int]], name: str, line: int) -> None:
+    lines = table.setdefault(name, [])
+    if (not lines or lines[-1] != line) and len(lines) < MAX_LINES_PER_NAME:
+        lines.append(line)
+
+
+def _index_python(source: str) -> FileIndex | None:
+    try:
+        tree = ast.parse(source)
+    except (SyntaxError, ValueError):
+        return None
+
+    file_index = FileIndex()
+    parents: dict[ast.AST, ast.ClassDef] = {}
+    for node in ast.walk(tree):
+        if isinstance(node, ast.ClassDef):
+            for child in node.body:
+                parents[child] = node
+
+    occurrences: list[tuple[dict[str, list[int]], str, int]] = []
+    for node in ast.walk(tree):
+        if isinstance(node, (ast.ClassDef, ast.FunctionDef, ast.AsyncFunctionDef)):
+            parent = parents.get(node)
+            if isinstance(node, ast.ClassDef):
+                kind = "class"
+            else:
+                kind = "method" if parent is not None else "function"
+            file_index.definitions.append(
+                Symbol(
+                    name=node.name,
+                    kind=kind,
+                    line=node.lineno,
+                    end_line=node.end_lineno or node.lineno,
+                    parent=parent.name if parent is not None else None,
+                )
+            )
+        elif isinstance(node, ast.Name):
+            occurrences.append((file_index.names, node.id, node.lineno))
+        elif isinstance(node, ast.Attribute):
+            occurrences.append((file_index.attributes, node.attr, node.lineno))
+            if isinstance(node.value, ast.Name):
+                occurrences.append(
+                    (file_index.names, f"{node.value.id}.{node.attr}", node.lineno)
+                )
+        elif isinstance(node, ast.ImportFrom):
+            for alias in node.names:
+                occurrences.append((file_index.names, alias.name, node.lineno))
+
+    for table, name, line in sorted(occurrences, key=lambda item: item[2]):
+        _add_occurrence(table, name, line)
+    return file_index
+
+
+def code_tokens(lines: list[str], suffix: str):
+    """Yield (line number, identifier, follows `.`/`->`/`::`) for identifiers
+    in code, skipping string literals and comments."""
+    in_block = False
+    for number, text in enumerate(lines, start=1):
+        if in_block:
+            end = text.find("*/")
+            if end == -1:
+                continue
+            text = text[end + 2 :]
+            in_block = False
+        text = STRING_RE.sub('""', text)
+        text = BLOCK_COMMENT_RE.sub(" ", text)
+        start = text.find("/*")
+        if start != -1:
+            text = text[:start]
+            in_block = True
+        text = text.split("//", 1)[0]
+        if suffix in HASH_COMMENT_EXTENSIONS:
+            text = text.split("#", 1)[0]
+        for match in TOKEN_RE.finditer(text):
+            yield number, match.group(2), match.group(1) is not None
+
+
+def _tagged_definitions(lines: list[str]) -> list[Symbol]:
+    found: list[tuple[str, str, int]] = []
+    for number, text in enumerate(lines, start=1):
+        for pattern, kind in DEFINITION_PATTERNS:
+            match = pattern.match(text)
+            if match:
+                found.append((match.group(1), kind, number))
+                break
+
+    # Without a parser the end of a definition is approximated by the next one
+    symbols: list[Symbol] = []
+    for index, (name, kind, line) in enumerate(found):
+        end_line = found[index + 1][2] - 1 if index + 1 < len(found) else len(lines)
+        symbols.append(Symbol(name=name, kind=kind, line=line, end_line=end_line))
+    return symbols
+
+
+def index_file(path: Path) -> FileIndex | None:
+    try:
+        if path.stat().st_size > MAX_FILE_BYTES:
+            return None
+        source = path.read_text(encoding="utf-8")
+    except (OSError, UnicodeDecodeError):
+        return None
+
+    if path.suffix == ".py":
+        file_index = _index_python(source)
+        if file_index is not None:
+            return file_index
+
+    lines = source.splitlines()
+    file_index = FileIndex(definitions=_tagged_definitions(lines))
+    for number, name, is_attribute in code_tokens(lines, path.suffix):
+        table = file_index.attributes if is_attribute else file_index.names
+        _add_occurrence(table, name, number)
+    return file_index
+
+
+def _git(repo_dir: str, *args: str) -> str | None:
+    result = subprocess.run(
+        ["git", *args], cwd=repo_dir, capture_output=True, text=True
+    )
+    return result.stdout if result.returncode == 0 else None
+
+
+def _source_files(repo_dir: str) -> list[str]:
+    listed = _git(repo_dir, "ls-files") or ""
+    files = [f for f in listed.splitlines() if Path(f).suffix in SOURCE_EXTENSIONS]
+    return files[:MAX_INDEXED_FILES]
+
+
+def _cache_dir(full_name: str) -> Path:
+    return CONTEXT_DIR / full_name.replace("/", "__")
+
+
+def _load_cached(path: Path) -> RepoIndex | None:
+    try:
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            index = RepoIndex.model_validate_json(f.read())
+    except FileNotFoundError:
+        return None
+    except (OSError, EOFError, ValueError) as exc:
+        # Truncated or corrupt: drop it so the next build rewrites it
+        logger.warning(f"Discarding unreadable context index {path.name}: {exc}")
+        path.unlink(missing_ok=True)
+        return None
+    return index if index.version == INDEX_VERSION else None
+
+
+def _save_cached(full_name: str, index: RepoIndex) -> None:
+    directory = _cache_dir(full_name)
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f"{index.commit}.json.gz"
+    tmp_path = path.with_suffix(".tmp")
+    try:
+        with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+            f.write(index.model_dump_json())
+        os.replace(tmp_path, path)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+
+    cached = sorted(directory.glob("*.json.gz"), key=lambda p: p.stat().st_mtime)
+    for stale in cached[:-MAX_CACHED_COMMITS]:
+        stale.unlink(missing_ok=True)
+
+
+def load_repo_index(repo_dir: str, full_name: str) -> RepoIndex:
+    """Index the checked-out commit, reusing the cache when possible.
+
+    An exact cache hit is returned as is. Otherwise the newest cached index
+    whose commit exists in the clone is updated incrementally: only files
+    changed between that commit and HEAD are re-indexed.
+    """
+    commit = (_git(repo_dir, "rev-parse", "HEAD") or "").strip()
+    directory = _cache_dir(full_name)
+
+    if commit:
+        exact = _load_cached(directory / f"{commit}.json.gz")
+        if exact is not None:
+            logger.info(f"Context index cache hit for {full_name}@{commit[:12]}")
+            return exact
+
+    files = _source_files(repo_dir)
+    base: RepoIndex | None = None
+    stale: set[str] = set(files)
+    if commit and directory.is_dir():
+        for path in sorted(directory.glob("*.json.gz"), key=lambda p: -p.stat().st_mtime):
+            base_commit = path.name.removesuffix(".json.gz")
+            changed = _git(repo_dir, "diff", "--name-only", base_commit, "HEAD")
+            if changed is None:
+                continue  # commit not in this clone
+            base = _load_cached(path)
+            if base is not None:
+                stale = set(changed.splitlines())
+                break
+
+    index = RepoIndex(commit=commit)
+    for name in files:
+        if base is not None and name not in stale and name in base.files:
+            index.files[name] = base.files[name]
+            continue
+        file_index = index_file(Path(repo_dir) / name)
+        if file_index is not None:
+            index.files[name] = file_index
+
+    reused = len(files) - len(stale & set(files)) if base is not None else 0
+    logger.info(
+        f"Indexed {full_name}@{commit[:12]}: {len(index.files)} files, "
+        f"{reused} reused from cache"
+    )
+    if commit:
+        try:
+            _save_cached(full_name, index)
+        except OSError as exc:
+            logger.warning(f"Failed to cache context index: {exc}")
+    return index
+
+
+def _read_lines(repo_dir: str, path: str, cache: dict[str, list[str]]) -> list[str]:
+    if path not in cache:
+        try:
+            cache[path] = (Path(repo_dir) / path).read_text(encoding="utf-8").splitlines()
+        except (OSError, UnicodeDecodeError):
+            cache[path] = []
+    return cache[path]
+
+
+def _reference_lines(file_index: FileIndex, symbol: Symbol, defined_in: str) -> list[int]:
+    if Path(defined_in).suffix != ".py":
+        return file_index.names.get(symbol.name, []) + file_index.attributes.get(symbol.name, [])
+    if symbol.kind == "method":
+        # Only reachable through an attribute, e.g. `self.name()` or `obj.name`
+        return file_index.attributes.get(symbol.name, [])
+    module = Path(defined_in).stem
+    return file_index.names.get(symbol.name, []) + file_index.names.get(
+        f"{module}.{symbol.name}", []
+    )
+
+
+def _references(
+    index: RepoIndex,
+    repo_dir: str,
+    symbol: Symbol,
+    defined_in: str,
+    lines_cache: dict[str, list[str]],
+) -> list[str]:
+    suffix = Path(defined_in).suffix
+    candidates = [
+        (path, file_index)
+        for path, file_index in index.files.items()
+        if (Path(path).suffix == ".py") == (suffix == ".py")
+    ]
+    if symbol.parent is not None:
+        # Files that use the method's class first; others may call a same-name method
+        candidates.sort(key=lambda item: symbol.parent not in item[1].names)
+
+    found: list[str] = []
+    for path, file_index in candidates:
+        for number in sorted(set(_reference_lines(file_index, symbol, defined_in))):
+            if path == defined_in and symbol.line <= number <= symbol.end_line:
+                continue
+            lines = _read_lines(repo_dir, path, lines_cache)
+            text = lines[number - 1] if number <= len(lines) else ""
+            found.append(f"{path}:{number}: {text.strip()[:160]}")
+            if len(found) >= MAX_REFERENCES:
+                return found
+    return found
+
+
+def build_context_pack(repo_dir: str, full_name: str, diff: str, max_chars: int) -> str:
+    """Render the context pack for `diff`, at most `max_chars` long."""
+    index = load_repo_index(repo_dir, full_name)
+    added = new_side_lines(diff, added_only=True)
+    lines_cache: dict[str, list[str]] = {}
+
+    changed: list[tuple[str, Symbol]] = []
+    used_names: set[str] = set()
+    for path, lines in added.items():
+        file_index = index.files.get(path)
+        for _, name, _ in code_tokens(list(lines.values()), Path(path).suffix):
+            used_names.add(name)
+        if file_index is None:
+            continue
+        for symbol in file_index.definitions:
+            if any(symbol.line <= number <= symbol.end_line for number in lines):
+                changed.append((path, symbol))
+
+    # Innermost symbols first (e.g. a method before its class), then by size of the change
+    changed.sort(key=lambda item: item[1].end_line - item[1].line)
+    changed = changed[:MAX_SYMBOLS]
+    changed_names = {symbol.name for _, symbol in changed}
+
+    sections: list[str] = []
+    for path, symbol in changed:
+        entry = [f"- {symbol.kind} `{symbol.name}` ({path}:{symbol.line}-{symbol.end_line})"]
+        references = _references(index, repo_dir, symbol, path, lines_cache)
+        if references:
+            entry.append("  Referenced at:")
+            entry.extend(f"    {ref}" for ref in references)
+        else:
+            entry.append("  No other references found.")
+        sections.append("\n".join(entry))
+
+    definitions: list[str] = []
+    per_name: dict[str, int] = {}
+    for path, file_index in index.files.items():
+        for symbol in file_index.definitions:
+            if symbol.name in used_names and symbol.name not in changed_names:
+                # Common names (e.g. `get`) can be defined in many places; keep a few
+                per_name[symbol.name] = per_name.get(symbol.name, 0) + 1
+                if per_name[symbol.name] > MAX_DEFINITIONS_PER_NAME:
+                    continue
+                lines = _read_lines(repo_dir, path, lines_cache)
+                signature = lines[symbol.line - 1].strip() if symbol.line <= len(lines) else ""
+                definitions.append(f"- {path}:{symbol.line}: {signature[:200]}")
+
+    pack = ""
+    parts = [("Changed symbols and their references:", sections)]
+    parts.append(("Definitions used by the changed code:", definitions))
+    for title, entries in parts:
+        if not entries:
+            continue
+        block = title
+        for entry in entries:
+            if len(pack) + len(block) + len(entry) + 2 > max_chars:
+                break
+            block += "\n" + entry
+        if block != title:
+            pack += block + "\n\n"
+
+    return pack.strip()
@@ -0,0 +1,108 @@
+"""Helpers for inspecting unified diffs."""
+
+import re
+from collections import Counter
+from pathlib import PurePosixPath
+
+from pydantic import BaseModel, Field
+
+
+DIFF_FILE_RE = re.compile(r"^diff --git a/(.+?) b/(.+)$")
+HUNK_RE = re.compile(r"^@@ -\d+(?:,\d+)? \+(\d+)(?:,\d+)? @@")
+
+# File extensions that are not source code; PRs touching only these are cheap to review
+NON_CODE_EXTENSIONS = {
+    ".md",
+    ".rst",
+    ".txt",
+    ".adoc",
+    ".lock",
+    ".svg",
+    ".png",
+    ".jpg",
+    ".gif",
+}
+
+
+class DiffStats(BaseModel):
+    """Size and language mix of a unified diff."""
+
+    size: int = 0  # characters
+    files: int = 0
+    additions: int = 0
+    deletions: int = 0
+    languages: dict[str, int] = Field(default_factory=dict)  # extension -> files
+
+    @property
+    def changed_lines(self) -> int:
+        return self.additions + self.deletions
+
+    @property
+    def has_code(self) -> bool:
+        """True if at least one changed file is source code."""
+        return any(ext not in NON_CODE_EXTENSIONS for ext in self.languages)
+
+
+def _language_of(path: str) -> str:
+    suffix = PurePosixPath(path).suffix.lower()
+    return suffix or PurePosixPath(path).name
+
+
+def summarize_diff(diff: str) -> DiffStats:
+    files = 0
+    additions = 0
+    deletions = 0
+    languages: Counter[str] = Counter()
+
+    for line in diff.splitlines():
+        match = DIFF_FILE_RE.match(line)
+        if match:
+            files += 1
+            languages[_language_of(match.group(2))] += 1
+        elif line.startswith("+") and not line.startswith("+++"):
+            additions += 1
+        elif line.startswith("-") and not line.startswith("---"):
+            deletions += 1
+
+    return DiffStats(
+        size=len(diff),
+        files=files,
+        additions=additions,
+        deletions=deletions,
+        languages=dict(languages),
+    )
+
+
+def new_side_lines(diff: str, added_only: bool = False) -> dict[str, dict[int, str]]:
+    """Map each file to {line number: text} for lines on the new side of its hunks.
+
+    With `added_only=True` only `+` lines are included, otherwise context
+    lines too (GitHub accepts review comments on both).
+    """
+    files: dict[str, dict[int, str]] = {}
+    current: dict[int, str] | None = None
+    line_number = 0
+
+    for line in diff.splitlines():
+        match = DIFF_FILE_RE.match(line)
+        if match:
+            current = files.setdefault(match.group(2), {})
+            line_number = 0
+            continue
+        if current is None:
+            continue
+        hunk = HUNK_RE.match(line)
+        if hunk:
+            line_number = int(hunk.group(1))
+            continue
+        if line_number == 0:
+            continue  # file header lines before the first hunk
+        if line.startswith("+"):
+            current[line_number] = line[1:]
+            line_number += 1
+        elif line.startswith(" "):
+            if not added_only:
+                current[line_number] = line[1:]
+            line_number += 1
+
+    return files
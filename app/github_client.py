@@ -2,13 +2,44 @@
 
 import asyncio
 import logging
+from collections import OrderedDict
 from typing import Any
 
 import httpx
 
+from app.comment_index import CommentIndex, CommentPlan
+
 
 logger = logging.getLogger(__name__)
 
+# Login of the account that posts reviews when the token cannot call /user
+# (GitHub Actions and app installation tokens)
+DEFAULT_BOT_LOGIN = "github-actions[bot]"
+COMMENT_CACHE_SIZE = 256  # PRs whose review comments are cached
+
+# PR -> (ETag, review comments) for PRs whose comments fit on one page.
+# Clients are per job, so the cache lives at module level to be reused by later pushes.
+_comment_cache: OrderedDict[str, tuple[str, list[dict[str, Any]]]] = OrderedDict()
+
+REVIEW_THREADS_QUERY = """
+query($owner: String!, $repo: String!, $number: Int!, $cursor: String) {
+  repository(owner: $owner, name: $repo) {
+    pullRequest(number: $number) {
+      reviewThreads(first: 100, after: $cursor) {
+        pageInfo { hasNextPage endCursor }
+        nodes { id isResolved comments(first: 1) { nodes { databaseId } } }
+      }
+    }
+  }
+}
+"""
+
+RESOLVE_THREAD_MUTATION = """
+mutation($threadId: ID!) {
+  resolveReviewThread(input: {threadId: $threadId}) { thread { id } }
+}
+"""
+
 
 class GitHubClient:
     """Async GitHub API client for PR code review operations."""
@@ -28,6 +59,7 @@ class GitHubClient:
             },
             timeout=30.0,
         )
+        self._bot_login: str | None = None
 
     async def clone_repo(self, clone_url: str, ref: str, target_dir: str) -> None:
         """Clone repository and checkout specific ref.
@@ -83,6 +115,43 @@ class GitHubClient:
 
         logger.info(f"Cloned to {target_dir} and checked out {ref}")
 
+    async def _paginate(
+        self, url: str, params: dict[str, Any] | None = None
+    ) -> list[dict[str, Any]]:
+        """GET every page of a list endpoint by following `Link: rel="next"`."""
+        items: list[dict[str, Any]] = []
+        next_url: str | None = url
+        next_params = {"per_page": 100, **(params or {})}
+
+        while next_url:
+            response = await self.client.get(next_url, params=next_params)
+            response.raise_for_status()
+            items.extend(response.json())
+            next_url = response.links.get("next", {}).get("url")
+            next_params = None  # the next link already carries the query string
+
+        return items
+
+    async def list_open_pulls(self, owner: str, repo: str) -> list[dict[str, Any]]:
+        """List all open pull requests of a repository, oldest first."""
+        url = f"https://api.github.com/repos/{owner}/{repo}/pulls"
+        return await self._paginate(
+            url, {"state": "open", "sort": "created", "direction": "asc"}
+        )
+
+    async def list_org_repos(self, org: str) -> list[dict[str, Any]]:
+        """List all non-archived repositories of an organization."""
+        url = f"https://api.github.com/orgs/{org}/repos"
+        repos = await self._paginate(url, {"type": "all"})
+        return [r for r in repos if not r.get("archived")]
+
+    async def get_pull(self, owner: str, repo: str, pr_number: int) -> dict[str, Any]:
+        """Fetch a single pull request object."""
+        url = f"https://api.github.com/repos/{owner}/{repo}/pulls/{pr_number}"
+        response = await self.client.get(url)
+        response.raise_for_status()
+        return response.json()
+
     async def get_pr_diff(self, owner: str, repo: str, pr_number: int) -> str:
         """Fetch PR unified diff.
 
@@ -107,6 +176,106 @@ class GitHubClient:
         logger.info(f"Fetched diff for PR #{pr_number} ({len(diff_text)} bytes)")
         return diff_text
 
+    async def bot_login(self) -> str:
+        """Login of the account the token posts as."""
+        if self._bot_login is None:
+            response = await self.client.get("https://api.github.com/user")
+            if response.is_success:
+                self._bot_login = response.json()["login"]
+            else:
+                self._bot_login = DEFAULT_BOT_LOGIN
+        return self._bot_login
+
+    async def list_review_comments(
+        self, owner: str, repo: str, pr_number: int
+    ) -> list[dict[str, Any]]:
+        """List all inline review comments of a PR.
+
+        PRs whose comments fit on one page are cached with the page's ETag
+        and re-requested conditionally; on 304 the cached list is returned.
+        The ETag covers the whole body, so edited, outdated (`line` set to
+        null) and deleted comments all invalidate it. Larger PRs are always
+        fetched in full, since an ETag only covers its own page.
+        """
+        key = f"{owner}/{repo}#{pr_number}"
+        url = f"https://api.github.com/repos/{owner}/{repo}/pulls/{pr_number}/comments"
+        params = {"per_page": 100}
+        cached = _comment_cache.get(key)
+
+        headers = {"If-None-Match": cached[0]} if cached else {}
+        response = await self.client.get(url, params=params, headers=headers)
+        if response.status_code == 304 and cached:
+            _comment_cache.move_to_end(key)
+            return cached[1]
+        response.raise_for_status()
+
+        comments = response.json()
+        next_url = response.links.get("next", {}).get("url")
+        if next_url:
+            _comment_cache.pop(key, None)
+            while next_url:
+                # The next link already carries the query string
+                response = await self.client.get(next_url)
+                response.raise_for_status()
+                comments.extend(response.json())
+                next_url = response.links.get("next", {}).get("url")
+            return comments
+
+        etag = response.headers.get("ETag")
+        if etag:
+            _comment_cache[key] = (etag, comments)
+            _comment_cache.move_to_end(key)
+            while len(_comment_cache) > COMMENT_CACHE_SIZE:
+                _comment_cache.popitem(last=False)
+        return comments
+
+    async def update_review_comment(
+        self, owner: str, repo: str, comment_id: int, body: str
+    ) -> None:
+        """Replace the body of an inline review comment."""
+        url = f"https://api.github.com/repos/{owner}/{repo}/pulls/comments/{comment_id}"
+        response = await self.client.patch(url, json={"body": body})
+        response.raise_for_status()
+
+    async def _graphql(self, query: str, variables: dict[str, Any]) -> dict[str, Any]:
+        response = await self.client.post(
+            "https://api.github.com/graphql",
+            json={"query": query, "variables": variables},
+        )
+        response.raise_for_status()
+        result = response.json()
+        if result.get("errors"):
+            raise RuntimeError(f"GraphQL error: {result['errors']}")
+        return result["data"]
+
+    async def resolve_review_threads(
+        self, owner: str, repo: str, pr_number: int, comment_ids: set[int]
+    ) -> int:
+        """Resolve the unresolved review threads started by the given comments.
+
+        Returns:
+            Number of threads resolved
+        """
+        thread_ids: list[str] = []
+        cursor: str | None = None
+        while True:
+            data = await self._graphql(
+                REVIEW_THREADS_QUERY,
+                {"owner": owner, "repo": repo, "number": pr_number, "cursor": cursor},
+            )
+            threads = data["repository"]["pullRequest"]["reviewThreads"]
+            for thread in threads["nodes"]:
+                first = thread["comments"]["nodes"]
+                if not thread["isResolved"] and first and first[0]["databaseId"] in comment_ids:
+                    thread_ids.append(thread["id"])
+            if not threads["pageInfo"]["hasNextPage"]:
+                break
+            cursor = threads["pageInfo"]["endCursor"]
+
+        for thread_id in thread_ids:
+            await self._graphql(RESOLVE_THREAD_MUTATION, {"threadId": thread_id})
+        return len(thread_ids)
+
     async def post_review(
         self,
         owner: str,
@@ -115,9 +284,16 @@ class GitHubClient:
         commit_sha: str,
         summary: str,
         comments: list[dict[str, Any]],
+        diff: str | None = None,
     ) -> dict[str, Any]:
         """Post code review with inline comments.
 
+        When `diff` is given, comments are checked against the bot's
+        comments already on the PR first: findings that are already posted
+        at the same code are skipped, reworded ones update the existing
+        comment in place, and threads whose code has since changed are
+        resolved.
+
         Args:
             owner: Repository owner
             repo: Repository name
@@ -125,6 +301,7 @@ class GitHubClient:
             commit_sha: Commit SHA to review
             summary: Review summary body
             comments: List of inline comments with path, line, body, side
+            diff: PR diff the comments were made against
 
         Returns:
             API response JSON
@@ -134,6 +311,21 @@ class GitHubClient:
         """
         url = f"https://api.github.com/repos/{owner}/{repo}/pulls/{pr_number}/reviews"
 
+        plan: CommentPlan | None = None
+        if diff is not None:
+            try:
+                index = CommentIndex(
+                    await self.list_review_comments(owner, repo, pr_number),
+                    await self.bot_login(),
+                )
+                plan = index.plan(comments, diff)
+                comments = plan.new
+            except Exception as exc:
+                logger.warning(
+                    f"Could not check existing comments on PR #{pr_number}, "
+                    f"posting all: {exc}"
+                )
+
         # Map comments to GitHub API format with side: RIGHT
         api_comments = [
             {
@@ -159,8 +351,31 @@ class GitHubClient:
             f"Posted review to PR #{pr_number}: {len(api_comments)} comments, "
             f"summary length {len(summary)}"
         )
+
+        if plan is not None:
+            await self._sync_existing_comments(owner, repo, pr_number, plan)
         return result
 
+    async def _sync_existing_comments(
+        self, owner: str, repo: str, pr_number: int, plan: CommentPlan
+    ) -> None:
+        # Best effort: the review itself is already posted
+        updated = resolved = 0
+        try:
+            for existing, body in plan.updates:
+                await self.update_review_comment(owner, repo, existing.id, body)
+                updated += 1
+            if plan.outdated:
+                resolved = await self.resolve_review_threads(
+                    owner, repo, pr_number, {c.id for c in plan.outdated}
+                )
+        except Exception as exc:
+            logger.warning(f"Failed to sync existing comments on PR #{pr_number}: {exc}")
+        logger.info(
+            f"PR #{pr_number}: skipped {len(plan.unchanged)} already posted comments, "
+            f"updated {updated}, resolved {resolved} outdated threads"
+        )
+
     async def close(self) -> None:
         """Close HTTP client and cleanup resources."""
         await self.client.aclose()
@@ -0,0 +1,190 @@
+"""Persistent record of CLI runs used to derive adaptive timeouts."""
+
+import logging
+import math
+import os
+import time
+from collections import defaultdict, deque
+from contextvars import ContextVar
+from pathlib import Path
+
+from pydantic import BaseModel, Field
+
+from app.config import STATE_DIR, RepoConfig
+
+
+logger = logging.getLogger(__name__)
+
+MAX_RUNS_PER_CLI = 500  # rolling window kept in memory per CLI
+MIN_SAMPLES = 5  # below this the static timeout is used
+NEIGHBOURS = 30  # number of most similar runs considered
+COMPACT_FACTOR = 2  # rewrite the file once it holds this many times the runs kept
+
+
+class RunRecord(BaseModel):
+    """One finished CLI invocation."""
+
+    cli: str
+    diff_size: int  # characters of unified diff sent to the CLI
+    duration: float  # seconds
+    outcome: str  # "success", "timeout", "error"
+    peak_rss_kb: int | None = None
+    cpu_seconds: float | None = None
+    timestamp: float = Field(default_factory=time.time)
+
+
+class CLIHealth(BaseModel):
+    """Rolling success rate and latency of one CLI."""
+
+    samples: int = 0
+    success_rate: float = 1.0
+    p50_latency: float | None = None  # seconds, successful runs only
+
+
+def _percentile(values: list[float], percentile: float) -> float:
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * min(max(percentile, 0.0), 100.0) / 100.0
+    low = math.floor(rank)
+    high = math.ceil(rank)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+class RunHistory:
+    """Rolling per-CLI run history, appended to a JSONL file when a path is set."""
+
+    def __init__(self, path: Path | None = None) -> None:
+        self.path = path
+        self._lines = 0  # records in the file, including ones no longer kept
+        self._runs: dict[str, deque[RunRecord]] = defaultdict(
+            lambda: deque(maxlen=MAX_RUNS_PER_CLI)
+        )
+        if path is not None:
+            self._load(path)
+
+    def _load(self, path: Path) -> None:
+        if not path.is_file():
+            return
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = RunRecord.model_validate_json(line)
+                    except ValueError:
+                        continue
+                    self._runs[record.cli].append(record)
+                    self._lines += 1
+        except OSError as exc:
+            logger.warning(f"Failed to load run history from {path}: {exc}")
+            return
+        self._maybe_compact()
+
+    def _kept(self) -> int:
+        return sum(len(runs) for runs in self._runs.values())
+
+    def _maybe_compact(self) -> None:
+        """Rewrite the file with only the runs kept in memory once it has
+        grown to COMPACT_FACTOR times that, so it stays bounded."""
+        limit = COMPACT_FACTOR * max(self._kept(), MAX_RUNS_PER_CLI)
+        if self.path is None or self._lines <= limit:
+            return
+        records = sorted(
+            (r for runs in self._runs.values() for r in runs), key=lambda r: r.timestamp
+        )
+        tmp_path = self.path.with_suffix(".tmp")
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                for record in records:
+                    f.write(record.model_dump_json() + "\n")
+            os.replace(tmp_path, self.path)
+        except OSError as exc:
+            logger.warning(f"Failed to compact run history: {exc}")
+            return
+        logger.info(f"Compacted run history from {self._lines} to {len(records)} runs")
+        self._lines = len(records)
+
+    def record(
+        self,
+        cli: str,
+        diff_size: int,
+        duration: float,
+        outcome: str,
+        peak_rss_kb: int | None = None,
+        cpu_seconds: float | None = None,
+    ) -> RunRecord:
+        record = RunRecord(
+            cli=cli,
+            diff_size=diff_size,
+            duration=duration,
+            outcome=outcome,
+            peak_rss_kb=peak_rss_kb,
+            cpu_seconds=cpu_seconds,
+        )
+        self._runs[cli].append(record)
+
+        if self.path is not None:
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(record.model_dump_json() + "\n")
+                self._lines += 1
+            except OSError as exc:
+                logger.warning(f"Failed to persist run history: {exc}")
+            self._maybe_compact()
+
+        return record
+
+    def runs(self, cli: str) -> list[RunRecord]:
+        return list(self._runs.get(cli, ()))
+
+    def health(self, cli: str, window: float) -> CLIHealth:
+        """Summarize runs of `cli` from the last `window` seconds."""
+        cutoff = time.time() - window
+        recent = [r for r in self._runs.get(cli, ()) if r.timestamp >= cutoff]
+        if not recent:
+            return CLIHealth()
+
+        durations = [r.duration for r in recent if r.outcome == "success"]
+        return CLIHealth(
+            samples=len(recent),
+            success_rate=len(durations) / len(recent),
+            p50_latency=_percentile(durations, 50.0) if durations else None,
+        )
+
+    def compute_timeout(self, cli: str, diff_size: int, repo_config: RepoConfig) -> int:
+        """Pick a timeout for `cli` on a diff of `diff_size` characters.
+
+        Uses the configured percentile of the durations of the most similar
+        past runs (by log diff size), times the safety factor, clamped to
+        [timeout_min, timeout_max]. Timed-out runs count with the duration
+        they were allowed, so repeated timeouts push the estimate up rather
+        than being ignored. Errors are excluded since they usually fail fast.
+        """
+        if not repo_config.adaptive_timeout:
+            return repo_config.timeout
+
+        samples = [r for r in self._runs.get(cli, ()) if r.outcome != "error"]
+        if len(samples) < MIN_SAMPLES:
+            return repo_config.timeout
+
+        target = math.log1p(diff_size)
+        samples.sort(key=lambda r: abs(math.log1p(r.diff_size) - target))
+        durations = [r.duration for r in samples[:NEIGHBOURS]]
+
+        estimate = (
+            _percentile(durations, repo_config.timeout_percentile)
+            * repo_config.timeout_safety_factor
+        )
+        return int(
+            min(max(estimate, repo_config.timeout_min), repo_config.timeout_max)
+        )
+
+
+run_history = RunHistory(STATE_DIR / "run_history.jsonl")
+
+# Set by app.replay so replayed jobs use a throwaway history
+current_history: ContextVar[RunHistory | None] = ContextVar("current_history", default=None)
+
+
+def get_run_history() -> RunHistory:
+    """The run history for the current job: the replay's, if one is active."""
+    return current_history.get() or run_history
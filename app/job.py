@@ -0,0 +1,31 @@
+"""State of a single review job, filled in as it moves through the pipeline."""
+
+import time
+
+from pydantic import BaseModel, Field
+
+from app.parser import ReviewResult
+from app.router import RoutingDecision
+
+
+class ReviewJob(BaseModel):
+    owner: str
+    repo: str
+    pr_number: int
+    commit_sha: str
+    status: str = "running"  # "running", "posted", "reviewed" (not posted), "failed"
+    error: str | None = None
+    routing: RoutingDecision | None = None
+    result: ReviewResult | None = None
+    started_at: float = Field(default_factory=time.time)
+    finished_at: float | None = None
+
+    @property
+    def full_name(self) -> str:
+        return f"{self.owner}/{self.repo}"
+
+    @property
+    def duration(self) -> float | None:
+        if self.finished_at is None:
+            return None
+        return self.finished_at - self.started_at
@@ -1,21 +1,40 @@
+import json
 import logging
 import os
+from contextlib import asynccontextmanager
 
 from dotenv import load_dotenv
+
+# Before importing app modules, which read settings from the environment at import time
+load_dotenv()
+
 from fastapi import FastAPI, HTTPException, Request
 
-from app.reviewer import process_review
+from app.admission import AdmissionController, read_body
+from app.cli.session import close_session_pools
+from app.reviewer import process_review, scheduler
 from app.webhook import verify_github_signature
 
-load_dotenv()
-
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-app = FastAPI(title="GitHub PR Code Review System")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    await close_session_pools()
+
+
+app = FastAPI(title="GitHub PR Code Review System", lifespan=lifespan)
 
 WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET", "")
 BOT_USERNAME = "github-actions[bot]"
+MAX_PAYLOAD_BYTES = int(os.getenv("MAX_PAYLOAD_BYTES", str(5 * 1024 * 1024)))
+MAX_BACKLOG = int(os.getenv("MAX_BACKLOG", "20"))
+DEDUPE_TTL_SECONDS = int(os.getenv("DEDUPE_TTL_SECONDS", "3600"))
+RETRY_AFTER_SECONDS = int(os.getenv("RETRY_AFTER_SECONDS", "60"))
+
+admission = AdmissionController(MAX_BACKLOG, DEDUPE_TTL_SECONDS)
 
 
 @app.get("/health")
@@ -23,15 +42,35 @@ async def health_check():
     return {"status": "ok"}
 
 
+@app.get("/metrics")
+async def metrics():
+    return {
+        "admission": {"backlog": admission.backlog, "max_backlog": admission.max_backlog},
+        "scheduler": scheduler.stats(),
+    }
+
+
 @app.post("/webhook")
 async def webhook_handler(request: Request):
-    await verify_github_signature(request, WEBHOOK_SECRET)
+    body = await read_body(request, MAX_PAYLOAD_BYTES)
+    verify_github_signature(
+        body, request.headers.get("X-Hub-Signature-256"), WEBHOOK_SECRET
+    )
 
     event_type = request.headers.get("X-GitHub-Event")
     if event_type != "pull_request":
         return {"status": "ignored", "reason": "not a pull_request event"}
 
-    payload = await request.json()
+    delivery_id = request.headers.get("X-GitHub-Delivery")
+    if delivery_id and admission.seen_delivery(delivery_id):
+        return {"status": "ignored", "reason": "duplicate delivery"}
+
+    try:
+        payload = json.loads(body)
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="Invalid JSON payload")
+    if not isinstance(payload, dict):
+        raise HTTPException(status_code=400, detail="Invalid JSON payload")
 
     action = payload.get("action")
     if action not in ["opened", "synchronize"]:
@@ -49,6 +88,30 @@ async def webhook_handler(request: Request):
     if not pr_number:
         raise HTTPException(status_code=400, detail="Missing pull_request.number")
 
-    await process_review(payload, github_token)
+    review_key = (
+        payload.get("repository", {}).get("full_name", ""),
+        pr_number,
+        payload.get("pull_request", {}).get("head", {}).get("sha", ""),
+    )
+    if admission.seen_review(review_key):
+        return {"status": "ignored", "reason": "commit already reviewed or in progress"}
+
+    if admission.is_full:
+        raise HTTPException(
+            status_code=429,
+            detail=f"Review backlog full ({admission.backlog} pending)",
+            headers={"Retry-After": str(RETRY_AFTER_SECONDS)},
+        )
+
+    # Deliveries are only remembered once admitted, so a delivery rejected with
+    # 429 (or whose review fails) can be redelivered
+    admission.admit(review_key, delivery_id)
+    job = None
+    try:
+        job = await process_review(payload, github_token)
+    finally:
+        admission.release(
+            review_key, job is not None and job.status == "posted", delivery_id
+        )
 
     return {"status": "reviewed", "pr": pr_number}
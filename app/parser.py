@@ -83,7 +83,8 @@ def extract_json_from_text(text: str) -> str | None:
     return _extract_balanced_json_object(text)
 
 
-def parse_review_output(raw_output: str) -> ReviewResult:
+def try_parse_review_output(raw_output: str) -> ReviewResult | None:
+    """Parse the review JSON in a CLI's output, or None if there is none."""
     json_text = extract_json_from_text(raw_output)
 
     if json_text is not None:
@@ -93,4 +94,11 @@ def parse_review_output(raw_output: str) -> ReviewResult:
         except (json.JSONDecodeError, ValidationError, TypeError):
             pass
 
+    return None
+
+
+def parse_review_output(raw_output: str) -> ReviewResult:
+    result = try_parse_review_output(raw_output)
+    if result is not None:
+        return result
     return ReviewResult(summary=raw_output, comments=[])
@@ -45,10 +45,18 @@ Original diff for reference:
 """
 
 
-def build_review_prompt(diff: str, language: str, extra_instructions: str = "") -> str:
+def build_review_prompt(
+    diff: str, language: str, extra_instructions: str = "", context_pack: str = ""
+) -> str:
     extra_section = ""
     if extra_instructions.strip():
         extra_section = f"\nAdditional instructions:\n{extra_instructions.strip()}\n"
+    if context_pack.strip():
+        extra_section += (
+            "\nRepository context (precomputed from the checked-out code; "
+            "use it before searching the repository yourself):\n"
+            f"{context_pack.strip()}\n"
+        )
 
     return f"""You are an expert pull request code reviewer.
 
@@ -0,0 +1,146 @@
+"""Opt-in recording of review jobs for offline replay.
+
+A `Recording` captures everything `process_review` consumes from the outside
+world (webhook payload, diff, repo instruction files, raw CLI output and
+timings) so the pipeline can be rerun deterministically by `app.replay`.
+"""
+
+import gzip
+import hashlib
+import logging
+import os
+import time
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any
+
+from pydantic import BaseModel, Field
+
+from app.config import STATE_DIR
+
+
+logger = logging.getLogger(__name__)
+
+RECORDINGS_DIR = STATE_DIR / "recordings"
+MAX_FIELD_BYTES = int(os.getenv("RECORD_MAX_FIELD_BYTES", str(2 * 1024 * 1024)))
+MAX_TOTAL_BYTES = int(os.getenv("RECORD_MAX_TOTAL_BYTES", str(500 * 1024 * 1024)))
+
+
+def _cap(text: str | None) -> str | None:
+    if text is None or len(text) <= MAX_FIELD_BYTES:
+        return text
+    return text[:MAX_FIELD_BYTES] + f"\n[truncated {len(text) - MAX_FIELD_BYTES} chars]"
+
+
+def prompt_hash(prompt: str) -> str:
+    return hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:16]
+
+
+class AdapterRun(BaseModel):
+    """Result of one `run_review` call as seen by the reviewer."""
+
+    cli: str
+    prompt_hash: str
+    output: str | None = None
+    error: str | None = None
+    timed_out: bool = False
+    duration: float
+    timeout: int | None = None  # limit the run was given; None in older recordings
+
+
+class ProcessRun(BaseModel):
+    """One CLI subprocess with its raw streams."""
+
+    command: str
+    stdout: str
+    stderr: str
+    returncode: int | None
+    duration: float
+
+
+class Recording(BaseModel):
+    recorded_at: float = Field(default_factory=time.time)
+    payload: dict[str, Any]
+    repo_config: dict[str, Any]
+    diff: str = ""
+    instruction_files: dict[str, str] = Field(default_factory=dict)
+    prompts: dict[str, str] = Field(default_factory=dict)
+    routing: dict[str, Any] | None = None
+    adapter_runs: list[AdapterRun] = Field(default_factory=list)
+    processes: list[ProcessRun] = Field(default_factory=list)
+    status: str | None = None
+    duration: float | None = None
+
+    def add_adapter_run(
+        self,
+        cli: str,
+        prompt: str,
+        output: str | None,
+        error: str | None,
+        timed_out: bool,
+        duration: float,
+        timeout: int | None = None,
+    ) -> None:
+        self.adapter_runs.append(
+            AdapterRun(
+                cli=cli,
+                prompt_hash=prompt_hash(prompt),
+                output=_cap(output),
+                error=_cap(error),
+                timed_out=timed_out,
+                duration=duration,
+                timeout=timeout,
+            )
+        )
+
+    def add_process(
+        self, command: str, stdout: str, stderr: str, returncode: int | None, duration: float
+    ) -> None:
+        self.processes.append(
+            ProcessRun(
+                command=command,
+                stdout=_cap(stdout),
+                stderr=_cap(stderr),
+                returncode=returncode,
+                duration=duration,
+            )
+        )
+
+    def save(self, directory: Path = RECORDINGS_DIR) -> Path:
+        """Write the recording gzip-compressed and prune the oldest recordings
+        so the directory stays under MAX_TOTAL_BYTES."""
+        directory.mkdir(parents=True, exist_ok=True)
+        repository = self.payload.get("repository", {})
+        pull_request = self.payload.get("pull_request", {})
+        name = "__".join(
+            [
+                repository.get("owner", {}).get("login", "unknown"),
+                repository.get("name", "unknown"),
+                str(pull_request.get("number", 0)),
+                pull_request.get("head", {}).get("sha", "")[:12],
+                str(int(self.recorded_at)),
+            ]
+        )
+        path = directory / f"{name}.json.gz"
+        with gzip.open(path, "wt", encoding="utf-8") as f:
+            f.write(self.model_dump_json())
+
+        recordings = sorted(directory.glob("*.json.gz"), key=lambda p: p.stat().st_mtime)
+        total = sum(p.stat().st_size for p in recordings)
+        while total > MAX_TOTAL_BYTES and len(recordings) > 1:
+            oldest = recordings.pop(0)
+            total -= oldest.stat().st_size
+            oldest.unlink(missing_ok=True)
+
+        return path
+
+    @classmethod
+    def load(cls, path: Path) -> "Recording":
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            return cls.model_validate_json(f.read())
+
+
+# Set by process_review for the duration of a recorded job
+current_recording: ContextVar[Recording | None] = ContextVar(
+    "current_recording", default=None
+)
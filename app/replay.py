@@ -0,0 +1,141 @@
+"""Replay recorded review jobs offline.
+
+Usage:
+    uv run python -m app.replay .state/recordings/owner__repo__12__abc.json.gz --scale 0
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import time
+from pathlib import Path
+from typing import Any
+
+from app.cli.replay import Replayer, current_replay
+from app.config import RepoConfig
+from app.github_client import GitHubClient
+from app.history import RunHistory, current_history
+from app.job import ReviewJob
+from app.recorder import Recording
+from app.reviewer import process_review
+
+
+logger = logging.getLogger(__name__)
+
+
+class StubGitHubClient(GitHubClient):
+    """Local stand-in for GitHub that serves a recording and captures posts."""
+
+    def __init__(self, recording: Recording) -> None:
+        super().__init__("replay")
+        self.recording = recording
+        self.posted: list[dict[str, Any]] = []
+
+    async def clone_repo(self, clone_url: str, ref: str, target_dir: str) -> None:
+        for name, content in self.recording.instruction_files.items():
+            path = Path(target_dir) / name
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(content, encoding="utf-8")
+
+    async def get_pr_diff(self, owner: str, repo: str, pr_number: int) -> str:
+        return self.recording.diff
+
+    async def post_review(
+        self,
+        owner: str,
+        repo: str,
+        pr_number: int,
+        commit_sha: str,
+        summary: str,
+        comments: list[dict[str, Any]],
+        diff: str | None = None,
+    ) -> dict[str, Any]:
+        review = {"commit_id": commit_sha, "body": summary, "comments": comments}
+        self.posted.append(review)
+        return review
+
+
+def replay_config(recording: Recording) -> RepoConfig:
+    """Recorded config pinned to the recorded routing decision, so replay
+    does not depend on this host's run history."""
+    repo_config = RepoConfig.model_validate(recording.repo_config)
+    # The context pack is taken from the recording instead of being rebuilt
+    updates: dict[str, Any] = {
+        "record_traffic": False,
+        "warm_sessions": False,
+        "context_pack": False,
+    }
+    if recording.routing is not None:
+        clis = recording.routing["clis"]
+        updates.update(
+            routing=False,
+            review_mode=recording.routing["mode"],
+            cli=clis[0],
+            fallback_cli=clis[1:],
+        )
+    return repo_config.model_copy(update=updates)
+
+
+async def replay_recording(
+    recording: Recording, scale: float = 1.0
+) -> tuple[ReviewJob | None, StubGitHubClient]:
+    """Run `process_review` against a recording.
+
+    Adapters return the recorded outputs after sleeping for the recorded
+    duration times `scale`, GitHub calls go to `StubGitHubClient`, and a
+    throwaway run history is used so real history is left untouched.
+    """
+    stub = StubGitHubClient(recording)
+    replay_token = current_replay.set(Replayer(recording, scale))
+    history_token = current_history.set(RunHistory())
+    try:
+        job = await process_review(
+            recording.payload,
+            "replay",
+            github_client=stub,
+            repo_config=replay_config(recording),
+        )
+    finally:
+        current_history.reset(history_token)
+        current_replay.reset(replay_token)
+    return job, stub
+
+
+async def _main(args: argparse.Namespace) -> None:
+    for path in args.recordings:
+        recording = Recording.load(Path(path))
+        started = time.monotonic()
+        job, stub = await replay_recording(recording, args.scale)
+        elapsed = time.monotonic() - started
+        print(
+            json.dumps(
+                {
+                    "recording": str(path),
+                    "recorded_status": recording.status,
+                    "recorded_duration": recording.duration,
+                    "status": job.status if job else None,
+                    "replay_duration": round(elapsed, 3),
+                    "posted": stub.posted,
+                },
+                ensure_ascii=False,
+                indent=2 if args.verbose else None,
+            )
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Replay recorded review jobs.")
+    parser.add_argument("recordings", nargs="+")
+    parser.add_argument(
+        "--scale", type=float, default=1.0, help="multiplier for recorded CLI latency"
+    )
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING)
+    asyncio.run(_main(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,18 +1,32 @@
 import asyncio
 import logging
+import os
 import shutil
 import tempfile
+import time
 from pathlib import Path
 
+from app import history
 from app.cli.base import get_adapter
+from app.cli.replay import current_replay
 from app.config import RepoConfig, load_config
+from app.context import build_context_pack
+from app.diff import summarize_diff
 from app.github_client import GitHubClient
-from app.parser import parse_review_output
+from app.job import ReviewJob
+from app.parser import ReviewResult, parse_review_output
 from app.prompt import build_review_prompt, build_synthesis_prompt
+from app.recorder import Recording, current_recording
+from app.router import route_review
+from app.scheduler import ReviewScheduler, classify_job
+from app.synthesis import synthesize_locally
 
 
 logger = logging.getLogger(__name__)
-_semaphore = asyncio.Semaphore(3)
+scheduler = ReviewScheduler(
+    capacity=int(os.getenv("REVIEW_CONCURRENCY", "3")),
+    aging_seconds=float(os.getenv("QUEUE_AGING_SECONDS", "300")),
+)
 
 INSTRUCTION_FILES = [
     "AGENTS.md",
@@ -47,18 +61,76 @@ def _load_repo_instructions(repo_dir: str) -> str:
     return "\n\n".join(parts)
 
 
+async def _run_cli(
+    cli_name: str,
+    prompt: str,
+    cwd: str,
+    repo_config: RepoConfig,
+    diff_size: int,
+    history_key: str | None = None,
+) -> str:
+    """Run one CLI with an adaptive timeout and record the run in history."""
+    history_key = history_key or cli_name
+    run_history = history.get_run_history()
+    timeout = run_history.compute_timeout(history_key, diff_size, repo_config)
+    logger.info(f"Timeout for '{history_key}' on {diff_size}-char diff: {timeout}s")
+
+    replay = current_replay.get()
+    recording = current_recording.get()
+    started = time.monotonic()
+    outcome = "error"
+    output: str | None = None
+    error: str | None = None
+    adapter = None
+    try:
+        if replay is not None:
+            adapter = replay.adapter(cli_name)
+        else:
+            adapter = get_adapter(
+                cli_name,
+                warm=repo_config.warm_sessions,
+                resources=repo_config.resources.get(cli_name),
+            )
+        output = await adapter.run_review(prompt, cwd, timeout)
+        outcome = "success"
+        return output
+    except asyncio.TimeoutError:
+        outcome = "timeout"
+        raise
+    except Exception as exc:
+        error = str(exc)
+        raise
+    finally:
+        # Time spent queueing for a warm session is not CLI run time
+        queue_wait = adapter.last_queue_wait if adapter is not None else 0.0
+        duration = time.monotonic() - started - queue_wait
+        usage = adapter.last_usage if adapter is not None else None
+        run_history.record(
+            history_key,
+            diff_size,
+            duration,
+            outcome,
+            peak_rss_kb=usage.peak_rss_kb if usage else None,
+            cpu_seconds=usage.cpu_seconds if usage else None,
+        )
+        if recording is not None:
+            recording.add_adapter_run(
+                cli_name, prompt, output, error, outcome == "timeout", duration, timeout
+            )
+
+
 async def _run_single_cli(
     cli_name: str,
     prompt: str,
     cwd: str,
-    timeout: int,
+    repo_config: RepoConfig,
+    diff_size: int,
     owner: str,
     repo: str,
     pr_number: int,
 ) -> str | None:
     try:
-        adapter = get_adapter(cli_name)
-        output = await adapter.run_review(prompt, cwd, timeout)
+        output = await _run_cli(cli_name, prompt, cwd, repo_config, diff_size)
         logger.info(f"CLI '{cli_name}' succeeded for {owner}/{repo}#{pr_number}")
         return output
     except Exception as exc:
@@ -68,19 +140,17 @@ async def _run_single_cli(
 
 async def _review_single_mode(
     repo_config: RepoConfig,
+    cli_order: list[str],
     prompt: str,
+    diff: str,
     cwd: str,
     owner: str,
     repo: str,
     pr_number: int,
 ) -> str:
-    cli_order = [repo_config.cli] + [
-        c for c in repo_config.fallback_cli if c != repo_config.cli
-    ]
-
     for cli_name in cli_order:
         raw_output = await _run_single_cli(
-            cli_name, prompt, cwd, repo_config.timeout, owner, repo, pr_number
+            cli_name, prompt, cwd, repo_config, len(diff), owner, repo, pr_number
         )
         if raw_output is not None:
             return raw_output
@@ -90,18 +160,17 @@ async def _review_single_mode(
 
 async def _review_multi_mode(
     repo_config: RepoConfig,
+    all_clis: list[str],
     prompt: str,
     diff: str,
     cwd: str,
     owner: str,
     repo: str,
     pr_number: int,
-) -> str:
-    all_clis = list(dict.fromkeys([repo_config.cli] + repo_config.fallback_cli))
-
+) -> ReviewResult:
     tasks = [
         _run_single_cli(
-            cli_name, prompt, cwd, repo_config.timeout, owner, repo, pr_number
+            cli_name, prompt, cwd, repo_config, len(diff), owner, repo, pr_number
         )
         for cli_name in all_clis
     ]
@@ -121,83 +190,244 @@ async def _review_multi_mode(
         logger.info(
             f"Only 1 CLI succeeded in multi-mode for {owner}/{repo}#{pr_number}, skipping synthesis"
         )
-        return next(iter(successful.values()))
+        return parse_review_output(next(iter(successful.values())))
+
+    local = synthesize_locally(successful, repo_config.language)
+    if local.unparsed:
+        logger.warning(
+            f"Unparseable review output from {', '.join(local.unparsed)} "
+            f"for {owner}/{repo}#{pr_number}"
+        )
+    fallback = local.result
+    if len(local.unparsed) == len(successful):
+        # Nothing parsed, so the merged review would be just the note: post
+        # the longest raw output as a summary rather than an empty review
+        fallback = parse_review_output(max(successful.values(), key=len))
+    # An LLM synthesizer can still use output that did not parse as review JSON
+    use_llm = repo_config.synthesis == "llm" or (
+        repo_config.synthesis == "auto" and (local.conflicts > 0 or bool(local.unparsed))
+    )
+    if not use_llm:
+        logger.info(
+            f"Merged {len(successful)} reviews ({', '.join(successful.keys())}) locally "
+            f"for {owner}/{repo}#{pr_number}: {len(local.result.comments)} comments, "
+            f"{local.conflicts} conflicts"
+        )
+        return fallback
 
     logger.info(
         f"Synthesizing {len(successful)} reviews ({', '.join(successful.keys())}) "
-        f"for {owner}/{repo}#{pr_number}"
+        f"for {owner}/{repo}#{pr_number} ({local.conflicts} conflicts)"
     )
     synthesis_prompt = build_synthesis_prompt(successful, diff, repo_config.language)
+    recording = current_recording.get()
+    if recording is not None:
+        recording.prompts["synthesis"] = synthesis_prompt
 
-    synthesizer = get_adapter(repo_config.synthesizer_cli)
     try:
-        return await synthesizer.run_review(synthesis_prompt, cwd, repo_config.timeout)
+        raw_output = await _run_cli(
+            repo_config.synthesizer_cli,
+            synthesis_prompt,
+            cwd,
+            repo_config,
+            len(diff),
+            history_key=f"{repo_config.synthesizer_cli}:synthesis",
+        )
+        return parse_review_output(raw_output)
     except Exception as exc:
         logger.warning(
             f"Synthesizer '{repo_config.synthesizer_cli}' failed: {exc}. "
-            f"Falling back to longest individual review."
+            f"Falling back to local synthesis."
         )
-        return max(successful.values(), key=len)
+        return fallback
 
 
-async def process_review(payload: dict, github_token: str) -> None:
-    async with _semaphore:
-        github_client: GitHubClient | None = None
-        temp_dir = tempfile.mkdtemp(prefix="pr-review-")
+async def _build_context_pack(
+    repo_dir: str, full_name: str, diff: str, max_chars: int
+) -> str:
+    started = time.monotonic()
+    try:
+        pack = await asyncio.to_thread(
+            build_context_pack, repo_dir, full_name, diff, max_chars
+        )
+    except Exception as exc:
+        logger.warning(f"Context pack failed for {full_name}: {exc}")
+        return ""
+    logger.info(
+        f"Built {len(pack)}-char context pack for {full_name} "
+        f"in {time.monotonic() - started:.2f}s"
+    )
+    return pack
 
-        try:
-            repository = payload.get("repository", {})
-            pull_request = payload.get("pull_request", {})
-            head = pull_request.get("head", {})
 
-            owner = repository.get("owner", {}).get("login", "")
-            repo = repository.get("name", "")
-            pr_number = pull_request.get("number")
-            commit_sha = head.get("sha", "")
-            clone_url = head.get("repo", {}).get("clone_url", "")
-            head_ref = head.get("ref", "")
+def _record_instruction_files(recording: Recording, repo_dir: str) -> None:
+    for name in INSTRUCTION_FILES:
+        path = Path(repo_dir) / name
+        if path.is_file():
+            try:
+                recording.instruction_files[name] = path.read_text(encoding="utf-8")
+            except Exception:
+                continue
+
+
+async def process_review(
+    payload: dict,
+    github_token: str,
+    post: bool = True,
+    github_client: GitHubClient | None = None,
+    repo_config: RepoConfig | None = None,
+) -> ReviewJob | None:
+    """Review the PR in a `pull_request` webhook payload.
+
+    The job waits for a slot from `scheduler`, prioritized by the PR size
+    in the payload. With `post=False` the review is only attached to the
+    returned job instead of being posted to GitHub. `github_client` and
+    `repo_config` override the per-job client and the config from
+    config.yaml (used by replay).
+    """
+    repository = payload.get("repository", {})
+    full_name = repository.get("full_name") or (
+        f"{repository.get('owner', {}).get('login', '')}/{repository.get('name', '')}"
+    )
+    if repo_config is None:
+        repo_config = load_config().get_repo_config(full_name)
 
-            if not owner or not repo or not pr_number or not commit_sha:
-                raise ValueError("Missing owner/repo/pr_number/commit_sha in payload")
-            if not clone_url or not head_ref:
-                raise ValueError("Missing clone_url/head_ref in payload")
+    priority_class, cost = classify_job(payload, repo_config)
+    async with scheduler.slot(full_name, priority_class, cost, repo_config.queue_weight):
+        return await _run_review_job(payload, github_token, post, github_client, repo_config)
 
-            app_config = load_config()
-            repo_config = app_config.get_repo_config(f"{owner}/{repo}")
 
-            github_client = GitHubClient(github_token)
+async def _run_review_job(
+    payload: dict,
+    github_token: str,
+    post: bool,
+    github_client: GitHubClient | None,
+    repo_config: RepoConfig,
+) -> ReviewJob | None:
+    job: ReviewJob | None = None
+    recording: Recording | None = None
+    recording_token = None
+    temp_dir = tempfile.mkdtemp(prefix="pr-review-")
+
+    try:
+        repository = payload.get("repository", {})
+        pull_request = payload.get("pull_request", {})
+        head = pull_request.get("head", {})
 
-            await github_client.clone_repo(clone_url, head_ref, temp_dir)
-            diff = await github_client.get_pr_diff(owner, repo, pr_number)
-            repo_instructions = _load_repo_instructions(temp_dir)
-            prompt = build_review_prompt(diff, repo_config.language, repo_instructions)
+        owner = repository.get("owner", {}).get("login", "")
+        repo = repository.get("name", "")
+        pr_number = pull_request.get("number")
+        commit_sha = head.get("sha", "")
+        clone_url = head.get("repo", {}).get("clone_url", "")
+        head_ref = head.get("ref", "")
 
-            if repo_config.review_mode == "multi":
-                raw_output = await _review_multi_mode(
-                    repo_config, prompt, diff, temp_dir, owner, repo, pr_number
-                )
-            else:
-                raw_output = await _review_single_mode(
-                    repo_config, prompt, temp_dir, owner, repo, pr_number
-                )
+        if not owner or not repo or not pr_number or not commit_sha:
+            raise ValueError("Missing owner/repo/pr_number/commit_sha in payload")
+        if not clone_url or not head_ref:
+            raise ValueError("Missing clone_url/head_ref in payload")
 
-            result = parse_review_output(raw_output)
+        job = ReviewJob(owner=owner, repo=repo, pr_number=pr_number, commit_sha=commit_sha)
+
+        if repo_config.record_traffic:
+            recording = Recording(payload=payload, repo_config=repo_config.model_dump())
+            recording_token = current_recording.set(recording)
+
+        if github_client is None:
+            github_client = GitHubClient(github_token)
 
-            await github_client.post_review(
+        await github_client.clone_repo(clone_url, head_ref, temp_dir)
+        diff = await github_client.get_pr_diff(owner, repo, pr_number)
+        repo_instructions = _load_repo_instructions(temp_dir)
+        context_pack = ""
+        replay = current_replay.get()
+        if replay is not None:
+            # The replay clone is not a git checkout; reuse the recorded pack
+            context_pack = replay.context_pack
+        elif repo_config.context_pack:
+            context_pack = await _build_context_pack(
+                temp_dir, f"{owner}/{repo}", diff, repo_config.context_max_chars
+            )
+        if recording is not None and context_pack:
+            recording.prompts["context"] = context_pack
+        prompt = build_review_prompt(
+            diff, repo_config.language, repo_instructions, context_pack
+        )
+
+        job.routing = route_review(
+            repo_config, summarize_diff(diff), history.get_run_history()
+        )
+        if recording is not None:
+            recording.diff = diff
+            _record_instruction_files(recording, temp_dir)
+            recording.prompts["review"] = prompt
+            recording.routing = job.routing.model_dump()
+        logger.info(
+            f"Routing {owner}/{repo}#{pr_number}: {job.routing.mode} "
+            f"{job.routing.clis} ({job.routing.reason})"
+        )
+
+        if job.routing.mode == "multi":
+            result = await _review_multi_mode(
+                repo_config,
+                job.routing.clis,
+                prompt,
+                diff,
+                temp_dir,
                 owner,
                 repo,
                 pr_number,
-                commit_sha,
-                result.summary,
-                [comment.model_dump() for comment in result.comments],
             )
-            logger.info(f"Posted review for {owner}/{repo}#{pr_number}")
-        except Exception as exc:
-            logger.error(f"Review orchestration failed: {exc}", exc_info=True)
-        finally:
-            if github_client is not None:
-                try:
-                    await github_client.close()
-                except Exception as exc:
-                    logger.error(f"Failed to close GitHub client: {exc}", exc_info=True)
-            shutil.rmtree(temp_dir, ignore_errors=True)
+        else:
+            raw_output = await _review_single_mode(
+                repo_config,
+                job.routing.clis,
+                prompt,
+                diff,
+                temp_dir,
+                owner,
+                repo,
+                pr_number,
+            )
+            result = parse_review_output(raw_output)
+
+        job.result = result
+        if not post:
+            job.status = "reviewed"
+            return job
+
+        await github_client.post_review(
+            owner,
+            repo,
+            pr_number,
+            commit_sha,
+            result.summary,
+            [comment.model_dump() for comment in result.comments],
+            diff=diff if repo_config.dedupe_comments else None,
+        )
+        logger.info(f"Posted review for {owner}/{repo}#{pr_number}")
+        job.status = "posted"
+    except Exception as exc:
+        logger.error(f"Review orchestration failed: {exc}", exc_info=True)
+        if job is not None:
+            job.status = "failed"
+            job.error = str(exc)
+    finally:
+        if job is not None:
+            job.finished_at = time.time()
+        if recording is not None:
+            current_recording.reset(recording_token)
+            recording.status = job.status
+            recording.duration = job.duration
+            try:
+                path = recording.save()
+                logger.info(f"Recorded review job to {path}")
+            except Exception as exc:
+                logger.error(f"Failed to save recording: {exc}", exc_info=True)
+        if github_client is not None:
+            try:
+                await github_client.close()
+            except Exception as exc:
+                logger.error(f"Failed to close GitHub client: {exc}", exc_info=True)
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+    return job
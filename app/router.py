@@ -0,0 +1,125 @@
+"""Pick which CLIs review a PR from its size and recent adapter health."""
+
+from pydantic import BaseModel
+
+from app.config import RepoConfig
+from app.diff import DiffStats
+from app.history import CLIHealth, RunHistory
+
+
+MIN_HEALTH_SAMPLES = 3  # runs needed before a CLI can be judged unhealthy
+
+
+class RoutingDecision(BaseModel):
+    """CLI order (single mode) or reviewer set (multi mode) for one job."""
+
+    mode: str  # "single" or "multi"
+    clis: list[str]
+    reason: str
+
+
+def _is_small(stats: DiffStats, repo_config: RepoConfig) -> bool:
+    if not stats.has_code:
+        return True
+    return (
+        stats.changed_lines <= repo_config.small_pr_max_lines
+        and stats.files <= repo_config.small_pr_max_files
+    )
+
+
+def _is_large(stats: DiffStats, repo_config: RepoConfig) -> bool:
+    return (
+        stats.changed_lines >= repo_config.large_pr_min_lines
+        or stats.files >= repo_config.large_pr_min_files
+    )
+
+
+def _score(cli: str, health: CLIHealth, repo_config: RepoConfig) -> float:
+    # Unknown latency ranks behind any measured CLI that finishes within the static timeout
+    latency = health.p50_latency if health.p50_latency is not None else repo_config.timeout
+    return latency + repo_config.cost_weight * repo_config.cli_cost_usd.get(cli, 0.0)
+
+
+def _language_share(cli: str, stats: DiffStats, repo_config: RepoConfig) -> float:
+    """Fraction of changed files in languages listed for `cli` in `cli_languages`."""
+    preferred = repo_config.cli_languages.get(cli)
+    if not preferred or not stats.files:
+        return 0.0
+    matched = sum(count for ext, count in stats.languages.items() if ext in preferred)
+    return matched / stats.files
+
+
+def _rank(
+    clis: list[str],
+    stats: DiffStats,
+    health: dict[str, CLIHealth],
+    repo_config: RepoConfig,
+) -> list[str]:
+    # CLIs suited to more of the changed files first, then by latency and cost;
+    # the sort is stable, so CLIs without data keep the configured order
+    return sorted(
+        clis,
+        key=lambda c: (
+            -_language_share(c, stats, repo_config),
+            _score(c, health[c], repo_config),
+        ),
+    )
+
+
+def route_review(
+    repo_config: RepoConfig, stats: DiffStats, run_history: RunHistory
+) -> RoutingDecision:
+    configured = list(dict.fromkeys([repo_config.cli] + repo_config.fallback_cli))
+
+    if not repo_config.routing:
+        return RoutingDecision(
+            mode=repo_config.review_mode, clis=configured, reason="routing disabled"
+        )
+
+    health = {
+        cli: run_history.health(cli, repo_config.routing_window) for cli in configured
+    }
+    unhealthy = [
+        cli
+        for cli in configured
+        if health[cli].samples >= MIN_HEALTH_SAMPLES
+        and health[cli].success_rate < repo_config.min_success_rate
+    ]
+    healthy = [cli for cli in configured if cli not in unhealthy]
+
+    notes = [
+        f"{stats.changed_lines} lines in {stats.files} files "
+        f"({', '.join(sorted(stats.languages)) or 'no files'})"
+    ]
+    if unhealthy:
+        notes.append(
+            "unhealthy: "
+            + ", ".join(f"{c} ({health[c].success_rate:.0%})" for c in unhealthy)
+        )
+    if not healthy:
+        healthy, unhealthy = unhealthy, []
+        notes.append("no healthy CLI, using all")
+
+    ranked = _rank(healthy, stats, health, repo_config)
+
+    if _is_small(stats, repo_config):
+        notes.insert(0, f"small PR, best ranked healthy CLI {ranked[0]} first")
+        return RoutingDecision(
+            mode="single", clis=ranked + unhealthy, reason="; ".join(notes)
+        )
+
+    if repo_config.review_mode == "multi":
+        if _is_large(stats, repo_config):
+            reviewers = ranked
+            notes.insert(0, f"large PR, multi review by {len(reviewers)} healthy CLIs")
+        else:
+            reviewers = ranked[: max(repo_config.medium_pr_reviewers, 1)]
+            notes.insert(
+                0, f"medium PR, multi review by top {len(reviewers)} of {len(ranked)}"
+            )
+        return RoutingDecision(mode="multi", clis=reviewers, reason="; ".join(notes))
+
+    notes.insert(0, "ranked healthy CLIs with unhealthy CLIs last")
+    return RoutingDecision(
+        mode="single", clis=ranked + unhealthy, reason="; ".join(notes)
+    )
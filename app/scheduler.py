@@ -0,0 +1,174 @@
+"""Size-aware priority scheduling of review jobs with per-repo fairness."""
+
+import asyncio
+import logging
+import time
+from collections import defaultdict, deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+
+from app.config import RepoConfig
+
+
+logger = logging.getLogger(__name__)
+
+# Relative cost of each class in virtual-time units
+CLASS_COST = {"small": 1.0, "medium": 4.0, "large": 16.0}
+WAIT_SAMPLES = 500  # recent queue waits kept per class
+
+
+def classify_job(payload: dict, repo_config: RepoConfig) -> tuple[str, float]:
+    """Estimate a job's priority class and cost from the webhook payload.
+
+    Uses `additions`, `deletions` and `changed_files` of the pull request,
+    which GitHub includes in `pull_request` events. Payloads without them,
+    such as backfill jobs built from the List-PRs endpoint, count as medium.
+    Multi-mode jobs that are not small enough to be routed to a single
+    reviewer cost twice as much.
+    """
+    pull_request = payload.get("pull_request", {})
+    lines = (pull_request.get("additions") or 0) + (pull_request.get("deletions") or 0)
+    files = pull_request.get("changed_files") or 0
+
+    if any(pull_request.get(key) is None for key in ("additions", "deletions", "changed_files")):
+        priority_class = "medium"  # size unknown
+    elif lines <= repo_config.small_pr_max_lines and files <= repo_config.small_pr_max_files:
+        priority_class = "small"
+    elif lines >= repo_config.large_pr_min_lines or files >= repo_config.large_pr_min_files:
+        priority_class = "large"
+    else:
+        priority_class = "medium"
+
+    cost = CLASS_COST[priority_class]
+    if repo_config.review_mode == "multi" and priority_class != "small":
+        cost *= 2
+    return priority_class, cost
+
+
+@dataclass
+class _Waiter:
+    repo: str
+    priority_class: str
+    cost: float
+    weight: float
+    enqueued_at: float
+    future: asyncio.Future = field(repr=False)
+
+
+class ReviewScheduler:
+    """Runs at most `capacity` jobs at once, choosing the next job by
+    weighted fair queuing across repos with aging.
+
+    Within a repo, the cheapest waiting job goes first, so a repo's small PR
+    does not wait behind its own queued large jobs. Across repos, each
+    repo's next job gets the virtual finish tag
+    `max(V, repo's last tag) + cost / weight` and the lowest tag is
+    dispatched, so repos with little queued work go first and a repo with
+    many queued jobs only gets its weighted share. While waiting, a job is
+    credited one large-job cost per `aging_seconds`, so large jobs are never
+    starved by a steady stream of small ones.
+    """
+
+    def __init__(self, capacity: int, aging_seconds: float) -> None:
+        self.capacity = capacity
+        self.aging_seconds = aging_seconds
+        self.running = 0
+        self._virtual_time = 0.0
+        self._repo_finish: dict[str, float] = defaultdict(float)
+        self._waiters: list[_Waiter] = []
+        self._waits: dict[str, deque[float]] = {
+            name: deque(maxlen=WAIT_SAMPLES) for name in CLASS_COST
+        }
+        self._dispatched: dict[str, int] = {name: 0 for name in CLASS_COST}
+
+    def _aging(self, waiter: _Waiter, now: float) -> float:
+        return (now - waiter.enqueued_at) / self.aging_seconds * CLASS_COST["large"]
+
+    def _tags(self, waiter: _Waiter) -> tuple[float, float]:
+        """Virtual start and finish tags if `waiter` were dispatched now."""
+        start_tag = max(self._virtual_time, self._repo_finish[waiter.repo])
+        return start_tag, start_tag + waiter.cost / max(waiter.weight, 1e-6)
+
+    def _priority(self, waiter: _Waiter, now: float) -> tuple[float, float]:
+        # Order within a repo: cheapest first, aged jobs catch up
+        return waiter.cost - self._aging(waiter, now), waiter.enqueued_at
+
+    def _next(self, now: float) -> _Waiter:
+        heads: dict[str, _Waiter] = {}
+        for waiter in self._waiters:
+            head = heads.get(waiter.repo)
+            if head is None or self._priority(waiter, now) < self._priority(head, now):
+                heads[waiter.repo] = waiter
+        # Across repos: weighted fair queuing on each repo's next job
+        return min(
+            heads.values(),
+            key=lambda w: (self._tags(w)[1] - self._aging(w, now), w.enqueued_at),
+        )
+
+    def _dispatch(self) -> None:
+        now = time.monotonic()
+        while self._waiters and self.running < self.capacity:
+            waiter = self._next(now)
+            self._waiters.remove(waiter)
+            start_tag, finish_tag = self._tags(waiter)
+            self._repo_finish[waiter.repo] = finish_tag
+            self._virtual_time = max(self._virtual_time, start_tag)
+            self.running += 1
+
+            wait = now - waiter.enqueued_at
+            self._waits[waiter.priority_class].append(wait)
+            self._dispatched[waiter.priority_class] += 1
+            logger.info(
+                f"Scheduling {waiter.priority_class} job for {waiter.repo} "
+                f"after {wait:.1f}s in queue ({len(self._waiters)} still queued)"
+            )
+            waiter.future.set_result(None)
+
+    def _release(self) -> None:
+        self.running -= 1
+        self._dispatch()
+
+    @asynccontextmanager
+    async def slot(self, repo: str, priority_class: str, cost: float, weight: float = 1.0):
+        waiter = _Waiter(
+            repo=repo,
+            priority_class=priority_class,
+            cost=cost,
+            weight=weight,
+            enqueued_at=time.monotonic(),
+            future=asyncio.get_running_loop().create_future(),
+        )
+        self._waiters.append(waiter)
+        self._dispatch()
+
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+            elif waiter.future.done() and not waiter.future.cancelled():
+                self._release()  # dispatched just before cancellation
+            raise
+
+        try:
+            yield
+        finally:
+            self._release()
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    def stats(self) -> dict:
+        """Queue wait statistics per priority class, for tuning the policy."""
+        classes = {}
+        for name, waits in self._waits.items():
+            ordered = sorted(waits)
+            classes[name] = {
+                "queued": sum(1 for w in self._waiters if w.priority_class == name),
+                "dispatched": self._dispatched[name],
+                "wait_p50": ordered[len(ordered) // 2] if ordered else None,
+                "wait_p95": ordered[int(len(ordered) * 0.95)] if ordered else None,
+                "wait_max": ordered[-1] if ordered else None,
+            }
+        return {"capacity": self.capacity, "running": self.running, "classes": classes}
@@ -0,0 +1,35 @@
+"""Language-agnostic text similarity for comparing review comments."""
+
+import hashlib
+import re
+
+WHITESPACE_RE = re.compile(r"\s+")
+PUNCTUATION_RE = re.compile(r"[^\w\s]")
+
+
+def normalize_text(text: str) -> str:
+    """Lowercase, drop punctuation and markdown, and collapse whitespace."""
+    text = PUNCTUATION_RE.sub(" ", text.lower())
+    return WHITESPACE_RE.sub(" ", text).strip()
+
+
+def fingerprint(text: str) -> str:
+    """Stable hash of the normalized text."""
+    return hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()[:16]
+
+
+def _shingles(text: str, size: int = 3) -> set[str]:
+    # Character shingles work for languages without word spacing or with inflected words (e.g. Korean)
+    normalized = normalize_text(text).replace(" ", "")
+    if len(normalized) <= size:
+        return {normalized} if normalized else set()
+    return {normalized[i : i + size] for i in range(len(normalized) - size + 1)}
+
+
+def text_similarity(a: str, b: str) -> float:
+    """Jaccard similarity of character trigrams, in [0, 1]."""
+    shingles_a = _shingles(a)
+    shingles_b = _shingles(b)
+    if not shingles_a or not shingles_b:
+        return 0.0
+    return len(shingles_a & shingles_b) / len(shingles_a | shingles_b)
@@ -0,0 +1,128 @@
+"""Deterministic local synthesis of several reviews into one."""
+
+from collections.abc import Iterable
+
+from pydantic import BaseModel, Field
+
+from app.parser import ReviewComment, ReviewResult, try_parse_review_output
+from app.similarity import text_similarity
+
+LINE_WINDOW = 3  # comments this many lines apart can describe the same finding
+SIMILARITY_THRESHOLD = 0.35  # minimum text similarity to merge two comments
+
+# Fixed text added to the merged review, by review language; unknown languages use English
+LABELS = {
+    "en": {
+        "combined": "Combined review from {reviewers}.",
+        "reviewers": "Reviewers: {reviewers}",
+        "unparsed": "Output from {reviewers} could not be parsed and was left out.",
+    },
+    "ko": {
+        "combined": "{reviewers}의 리뷰를 종합했습니다.",
+        "reviewers": "리뷰어: {reviewers}",
+        "unparsed": "{reviewers}의 출력은 해석할 수 없어 제외했습니다.",
+    },
+}
+
+
+class _Cluster(BaseModel):
+    path: str
+    line: int
+    body: str
+    reviewers: list[str] = Field(default_factory=list)
+
+    def add(self, reviewer: str, comment: ReviewComment) -> None:
+        if reviewer not in self.reviewers:
+            self.reviewers.append(reviewer)
+        # Keep the most detailed wording as the representative comment
+        if len(comment.body) > len(self.body):
+            self.body = comment.body
+            self.line = comment.line
+
+
+class SynthesisResult(BaseModel):
+    result: ReviewResult
+    conflicts: int = 0  # locations where reviewers flagged different things
+    unparsed: list[str] = Field(default_factory=list)  # reviewers whose output was left out
+
+
+def _is_near(cluster: _Cluster, other: ReviewComment | _Cluster) -> bool:
+    return cluster.path == other.path and abs(cluster.line - other.line) <= LINE_WINDOW
+
+
+def _label(labels: dict[str, str], key: str, reviewers: Iterable[str]) -> str:
+    return labels[key].format(reviewers=", ".join(reviewers))
+
+
+def synthesize_locally(reviews: dict[str, str], language: str = "en") -> SynthesisResult:
+    """Merge raw reviewer outputs without an LLM call.
+
+    Outputs without valid review JSON are left out rather than pasted into
+    the summary, and listed in `unparsed`. Comments on the same
+    path within `LINE_WINDOW` lines whose text is similar are merged into
+    one comment attributed to every reviewer that raised it. Nearby
+    comments from different reviewers that do not merge are counted as
+    conflicts, which callers can use to decide whether an LLM synthesis
+    is worth its cost.
+    """
+    labels = LABELS.get(language.lower(), LABELS["en"])
+    parsed: dict[str, ReviewResult] = {}
+    unparsed: list[str] = []
+    for name, output in reviews.items():
+        review = try_parse_review_output(output)
+        if review is None:
+            unparsed.append(name)
+        else:
+            parsed[name] = review
+
+    clusters: list[_Cluster] = []
+    for reviewer, review in parsed.items():
+        for comment in sorted(review.comments, key=lambda c: (c.path, c.line)):
+            match = next(
+                (
+                    cluster
+                    for cluster in clusters
+                    if _is_near(cluster, comment)
+                    and text_similarity(cluster.body, comment.body) >= SIMILARITY_THRESHOLD
+                ),
+                None,
+            )
+            if match is None:
+                match = _Cluster(path=comment.path, line=comment.line, body=comment.body)
+                clusters.append(match)
+            match.add(reviewer, comment)
+
+    conflicts = 0
+    for index, cluster in enumerate(clusters):
+        for other in clusters[index + 1 :]:
+            if not _is_near(cluster, other):
+                continue
+            # One reviewer adding an extra finding next to a shared one is not a disagreement
+            a, b = set(cluster.reviewers), set(other.reviewers)
+            if not (a <= b or b <= a):
+                conflicts += 1
+
+    clusters.sort(key=lambda c: (-len(c.reviewers), c.path, c.line))
+    comments = [
+        ReviewComment(
+            path=cluster.path,
+            line=cluster.line,
+            body=f"{cluster.body}\n\n_{_label(labels, 'reviewers', cluster.reviewers)}_",
+        )
+        for cluster in clusters
+    ]
+
+    summary_parts = []
+    if parsed:
+        summary_parts.append(_label(labels, "combined", parsed))
+    for reviewer, review in parsed.items():
+        if review.summary.strip():
+            summary_parts.append(f"**{reviewer}**: {review.summary.strip()}")
+    if unparsed:
+        summary_parts.append(f"_{_label(labels, 'unparsed', unparsed)}_")
+
+    return SynthesisResult(
+        result=ReviewResult(summary="\n\n".join(summary_parts), comments=comments),
+        conflicts=conflicts,
+        unparsed=unparsed,
+    )
@@ -1,19 +1,19 @@
 import hmac
 import hashlib
-from fastapi import Request, HTTPException
+from fastapi import HTTPException
 
 
-async def verify_github_signature(request: Request, secret: str) -> None:
+def verify_github_signature(body: bytes, signature_header: str | None, secret: str) -> None:
     """Verify GitHub webhook signature using HMAC-SHA256.
 
     Args:
-        request: FastAPI request object
+        body: Raw request body, read once by the caller
+        signature_header: Value of the X-Hub-Signature-256 header
         secret: Webhook secret for HMAC computation
 
     Raises:
         HTTPException: 403 if signature is invalid or missing
     """
-    signature_header = request.headers.get("X-Hub-Signature-256")
     if not signature_header:
         raise HTTPException(status_code=403, detail="Missing signature header")
 
@@ -23,9 +23,6 @@ async def verify_github_signature(request: Request, secret: str) -> None:
 
     expected_signature = signature_header[7:]  # Remove "sha256=" prefix
 
-    # Get raw request body
-    body = await request.body()
-
     # Compute HMAC-SHA256
     computed_signature = hmac.new(
         secret.encode("utf-8"), body, hashlib.sha256
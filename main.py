@@ -1,5 +1,4 @@
-def main():
-    print("Hello from code-review!")
+from app.backfill import main
 
 
 if __name__ == "__main__":
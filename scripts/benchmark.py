@@ -0,0 +1,277 @@
+"""Latency benchmarks for the review pipeline.
+
+Usage:
+    uv run python scripts/benchmark.py sessions --cli opencode --runs 5
+    uv run python scripts/benchmark.py webhook --requests 2000 --concurrency 50
+    uv run python scripts/benchmark.py replay .state/recordings --scale 0.1
+    uv run python scripts/benchmark.py context --repo-dir ../some-clone --base origin/main --cli claude
+"""
+
+import argparse
+import asyncio
+import hashlib
+import hmac
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.cli.base import get_adapter  # noqa: E402
+from app.cli.session import close_session_pools  # noqa: E402
+
+BENCH_PROMPT = 'Reply with the JSON {"summary": "ok", "comments": []} and nothing else.'
+
+
+def _report(label: str, timings: list[float]) -> None:
+    if not timings:
+        print(f"{label:<12} no successful runs")
+        return
+    print(
+        f"{label:<12} runs={len(timings):<3} "
+        f"first={timings[0]:7.2f}s "
+        f"mean={statistics.mean(timings):7.2f}s "
+        f"p50={statistics.median(timings):7.2f}s "
+        f"min={min(timings):7.2f}s "
+        f"max={max(timings):7.2f}s"
+    )
+
+
+async def _time_reviews(cli: str, warm: bool, runs: int, timeout: int) -> list[float]:
+    timings: list[float] = []
+    for _ in range(runs):
+        # A fresh directory per run mirrors the per-job clone isolation
+        with tempfile.TemporaryDirectory(prefix="bench-") as cwd:
+            adapter = get_adapter(cli, warm=warm)
+            started = time.monotonic()
+            try:
+                await adapter.run_review(BENCH_PROMPT, cwd, timeout)
+            except Exception as exc:
+                print(f"  {'warm' if warm else 'cold'} run failed: {exc}")
+                continue
+            timings.append(time.monotonic() - started)
+    return timings
+
+
+async def bench_sessions(args: argparse.Namespace) -> None:
+    adapter = get_adapter(args.cli)
+    if not adapter.supports_warm_session:
+        print(f"CLI '{args.cli}' has no warm session support; only cold runs measured")
+
+    cold = await _time_reviews(args.cli, False, args.runs, args.timeout)
+    warm: list[float] = []
+    if adapter.supports_warm_session:
+        try:
+            warm = await _time_reviews(args.cli, True, args.runs, args.timeout)
+        finally:
+            await close_session_pools()
+
+    print(f"\n{args.cli}: cold spawn vs warm reuse")
+    _report("cold", cold)
+    _report("warm", warm)
+    if cold and len(warm) > 1:
+        # The first warm run includes server startup; compare steady-state reuse
+        saved = statistics.median(cold) - statistics.median(warm[1:])
+        print(f"median saving per review after warm-up: {saved:.2f}s")
+
+
+async def bench_webhook(args: argparse.Namespace) -> None:
+    """Load-test webhook admission in-process.
+
+    The review pipeline is replaced by a sleep of `--job-seconds`, so this
+    measures signature checking, body handling, dedupe and backpressure,
+    not CLI work. A share of requests repeat an earlier head SHA to exercise
+    dedupe; once the backlog is full the rest should get 429.
+    """
+    import httpx
+
+    os.environ.setdefault("WEBHOOK_SECRET", "bench-secret")
+    import app.main as main_module
+
+    async def fake_process_review(payload: dict, github_token: str):
+        await asyncio.sleep(args.job_seconds)
+        return SimpleNamespace(status="posted")
+
+    main_module.process_review = fake_process_review
+    secret = main_module.WEBHOOK_SECRET.encode()
+
+    def signed_request(index: int) -> tuple[bytes, dict[str, str]]:
+        sha_index = index // 2 if index % 4 == 0 else index  # every 4th repeats a SHA
+        body = json.dumps(
+            {
+                "action": "synchronize",
+                "repository": {"full_name": "bench/repo", "name": "repo"},
+                "pull_request": {"number": 1, "head": {"sha": f"{sha_index:040x}"}},
+                "sender": {"login": "bench-user"},
+            }
+        ).encode()
+        signature = hmac.new(secret, body, hashlib.sha256).hexdigest()
+        return body, {
+            "Content-Type": "application/json",
+            "X-GitHub-Event": "pull_request",
+            "X-GitHub-Delivery": f"bench-{index}",
+            "X-GitHub-Token": "bench-token",
+            "X-Hub-Signature-256": f"sha256={signature}",
+        }
+
+    statuses: Counter[str] = Counter()
+    latencies: list[float] = []
+    limit = asyncio.Semaphore(args.concurrency)
+    transport = httpx.ASGITransport(app=main_module.app)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+
+        async def send(index: int) -> None:
+            body, headers = signed_request(index)
+            async with limit:
+                started = time.monotonic()
+                response = await client.post("/webhook", content=body, headers=headers)
+                latencies.append(time.monotonic() - started)
+            reason = response.json().get("reason", "") if response.status_code == 200 else ""
+            statuses[f"{response.status_code} {reason}".strip()] += 1
+
+        started = time.monotonic()
+        await asyncio.gather(*(send(i) for i in range(args.requests)))
+        elapsed = time.monotonic() - started
+
+    print(f"\nwebhook admission: {args.requests} requests, concurrency {args.concurrency}")
+    print(f"throughput   {args.requests / elapsed:8.1f} req/s over {elapsed:.2f}s")
+    latencies.sort()
+    print(
+        f"latency      p50={statistics.median(latencies) * 1000:.1f}ms "
+        f"p99={latencies[int(len(latencies) * 0.99) - 1] * 1000:.1f}ms"
+    )
+    for status, count in statuses.most_common():
+        print(f"  {count:6d}  {status}")
+
+
+async def bench_replay(args: argparse.Namespace) -> None:
+    """Replay recorded jobs concurrently to benchmark parser, synthesis and
+    scheduling changes against real traffic."""
+    from app.recorder import Recording
+    from app.replay import replay_recording
+
+    paths = sorted(Path(args.recordings).glob("*.json.gz"))
+    if not paths:
+        print(f"No recordings in {args.recordings}")
+        return
+    recordings = [Recording.load(path) for path in paths]
+
+    async def replay(recording: Recording) -> tuple[float, str]:
+        started = time.monotonic()
+        job, _ = await replay_recording(recording, args.scale)
+        return time.monotonic() - started, job.status if job else "not started"
+
+    started = time.monotonic()
+    results = await asyncio.gather(*(replay(r) for r in recordings))
+    elapsed = time.monotonic() - started
+
+    durations = [duration for duration, _ in results]
+    statuses = Counter(status for _, status in results)
+    recorded = [r.duration for r in recordings if r.duration is not None]
+    print(f"\nreplay: {len(recordings)} recordings at latency scale {args.scale}")
+    print(f"wall time    {elapsed:.2f}s ({len(recordings) / elapsed * 60:.1f} jobs/min)")
+    _report("replayed", durations)
+    _report("recorded", recorded)
+    print("  " + ", ".join(f"{status}: {count}" for status, count in statuses.items()))
+
+
+async def bench_context(args: argparse.Namespace) -> None:
+    """Compare CLI wall time on the same diff with and without the context pack."""
+    from app.context import build_context_pack
+    from app.prompt import build_review_prompt
+
+    diff = subprocess.run(
+        ["git", "diff", f"{args.base}...HEAD"],
+        cwd=args.repo_dir,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    if not diff.strip():
+        print(f"No changes between {args.base} and HEAD in {args.repo_dir}")
+        return
+
+    started = time.monotonic()
+    pack = build_context_pack(args.repo_dir, args.repo_name, diff, args.max_chars)
+    print(f"context pack: {len(pack)} chars built in {time.monotonic() - started:.2f}s")
+
+    variants = {
+        "without": build_review_prompt(diff, "en"),
+        "with": build_review_prompt(diff, "en", context_pack=pack),
+    }
+    timings: dict[str, list[float]] = {name: [] for name in variants}
+    for _ in range(args.runs):
+        # Alternate variants so drift in CLI latency affects both equally
+        for name, prompt in variants.items():
+            adapter = get_adapter(args.cli)
+            started = time.monotonic()
+            try:
+                await adapter.run_review(prompt, args.repo_dir, args.timeout)
+            except Exception as exc:
+                print(f"  {name} run failed: {exc}")
+                continue
+            timings[name].append(time.monotonic() - started)
+
+    print(f"\n{args.cli}: review wall time with and without context pack")
+    for name, values in timings.items():
+        _report(name, values)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    sessions = subparsers.add_parser(
+        "sessions", help="compare cold CLI spawn with warm session reuse"
+    )
+    sessions.add_argument("--cli", default="opencode")
+    sessions.add_argument("--runs", type=int, default=5)
+    sessions.add_argument("--timeout", type=int, default=300)
+    sessions.set_defaults(func=bench_sessions)
+
+    webhook = subparsers.add_parser(
+        "webhook", help="load-test webhook admission control in-process"
+    )
+    webhook.add_argument("--requests", type=int, default=2000)
+    webhook.add_argument("--concurrency", type=int, default=50)
+    webhook.add_argument(
+        "--job-seconds",
+        type=float,
+        default=0.05,
+        help="simulated review duration per admitted request",
+    )
+    webhook.set_defaults(func=bench_webhook)
+
+    replay = subparsers.add_parser(
+        "replay", help="replay recorded review jobs against the current pipeline"
+    )
+    replay.add_argument("recordings", help="directory of *.json.gz recordings")
+    replay.add_argument("--scale", type=float, default=1.0)
+    replay.set_defaults(func=bench_replay)
+
+    context = subparsers.add_parser(
+        "context", help="compare CLI wall time with and without the context pack"
+    )
+    context.add_argument("--repo-dir", required=True, help="local clone to review")
+    context.add_argument("--base", default="origin/main", help="diff base ref")
+    context.add_argument("--repo-name", default="benchmark/repo", help="index cache key")
+    context.add_argument("--cli", default="claude")
+    context.add_argument("--runs", type=int, default=3)
+    context.add_argument("--timeout", type=int, default=600)
+    context.add_argument("--max-chars", type=int, default=12000)
+    context.set_defaults(func=bench_context)
+
+    args = parser.parse_args()
+    asyncio.run(args.func(args))
+
+
+if __name__ == "__main__":
+    main()